@@ -0,0 +1,132 @@
+"""
+Benchmark harness: the `benchmark` fixture measures the throughput (items per second) of a
+hot path, stores it in a JSON results file and fails the benchmark if it is slower than the
+stored baseline by more than the threshold.
+    python3 -m pytest bench                          # Compare with bench/baseline.json
+    python3 -m pytest bench --bench-save-baseline    # Store the results as the new baseline
+Without a baseline file the benchmarks are measured and then skipped: there is nothing to compare with.
+"""
+import json
+import os
+import sys
+import time
+import pytest
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# The testbench packages (env, tests) and the root scripts (verif_dashboard, coverage_merge, ...)
+sys.path[:0] = [os.path.join(ROOT_DIR, "tb"), ROOT_DIR]
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("bench", "testbench benchmarks")
+    group.addoption("--bench-baseline", default=os.path.join(ROOT_DIR, "bench", "baseline.json"),
+                    help="Baseline results (default: bench/baseline.json)")
+    group.addoption("--bench-results", default=os.path.join(ROOT_DIR, "sim", "bench_results.json"),
+                    help="Results of this run (default: sim/bench_results.json)")
+    group.addoption("--bench-threshold", type=float, default=0.2,
+                    help="Allowed throughput drop relative to the baseline (default: 0.2 = 20%%)")
+    group.addoption("--bench-save-baseline", action="store_true",
+                    help="Write the results to the baseline file instead of comparing with it")
+    group.addoption("--bench-repeat", type=int, default=5,
+                    help="Runs of each benchmark; the fastest one counts (default: 5)")
+    group.addoption("--import-budget", type=float, default=1.5,
+                    help="Maximum time to import a test module in a fresh interpreter, in seconds (default: 1.5)")
+
+
+class BenchResults:
+    """Results of the session, and the baseline they are compared with"""
+
+    def __init__(self, config):
+        self.config = config
+        self.results = {}
+        self.baseline = {}
+        self.uncompared = []  # Benchmarks that are not in the baseline yet
+        path = config.getoption("--bench-baseline")
+        # No baseline file (e.g. a fresh clone): the benchmarks cannot be compared
+        self.missing = not config.getoption("--bench-save-baseline") and not os.path.isfile(path)
+        if not config.getoption("--bench-save-baseline") and not self.missing:
+            with open(path) as fp:
+                self.baseline = json.load(fp)["benchmarks"]
+
+    def add(self, name, items, seconds):
+        """Record a measurement. Returns the baseline throughput it fell below, or None."""
+        throughput = items / seconds if seconds else float("inf")
+        self.results[name] = {"items": items, "seconds": round(seconds, 6),
+                              "items_per_second": round(throughput, 3)}
+        reference = self.baseline.get(name, {}).get("items_per_second")
+        if reference is None and not self.config.getoption("--bench-save-baseline") and not self.missing:
+            self.uncompared.append(name)
+        if reference and throughput < reference * (1 - self.config.getoption("--bench-threshold")):
+            return reference
+        return None
+
+    def save(self):
+        benchmarks = self.results
+        if self.config.getoption("--bench-save-baseline"):
+            path = self.config.getoption("--bench-baseline")
+            # Keep the baseline of the benchmarks that did not run (e.g. skipped or deselected)
+            if os.path.isfile(path):
+                with open(path) as fp:
+                    benchmarks = {**json.load(fp)["benchmarks"], **self.results}
+        else:
+            path = self.config.getoption("--bench-results")
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "w") as fp:
+            json.dump({"timestamp": time.strftime("%Y-%m-%d %H:%M:%S"), "benchmarks": benchmarks}, fp, indent=2)
+
+
+bench_results_key = pytest.StashKey[BenchResults]()
+
+
+@pytest.fixture(scope="session")
+def bench_results(request):
+    results = BenchResults(request.config)
+    request.config.stash[bench_results_key] = results
+    yield results
+    results.save()
+
+
+@pytest.fixture
+def benchmark(request, bench_results):
+    """
+    benchmark(func, items): run func() --bench-repeat times and record the best throughput
+    (items per second) under the test's name. benchmark.record(items, seconds) records a
+    throughput measured elsewhere (e.g. by the simulation itself).
+    """
+    name = request.node.name
+
+    def check(reference):
+        if bench_results.missing:
+            measured = bench_results.results[name]["items_per_second"]
+            pytest.skip(f"{name}: {measured:.1f} items/s, not compared: no baseline "
+                        f"{request.config.getoption('--bench-baseline')} (store one with `make bench_baseline`)")
+        if reference is not None:
+            measured = bench_results.results[name]["items_per_second"]
+            pytest.fail(f"{name}: {measured:.1f} items/s, baseline {reference:.1f} items/s "
+                        f"(more than {request.config.getoption('--bench-threshold'):.0%} slower)")
+
+    def run(func, items):
+        best = float("inf")
+        for _ in range(request.config.getoption("--bench-repeat")):
+            start = time.perf_counter()
+            func()
+            best = min(best, time.perf_counter() - start)
+        check(bench_results.add(name, items, best))
+        return best
+
+    run.record = lambda items, seconds: check(bench_results.add(name, items, seconds))
+    return run
+
+
+def pytest_terminal_summary(terminalreporter, config):
+    if config.getoption("--bench-save-baseline"):
+        terminalreporter.write_line(f"Benchmark baseline saved to {config.getoption('--bench-baseline')}")
+        return
+    terminalreporter.write_line(f"Benchmark results saved to {config.getoption('--bench-results')}")
+    results = config.stash.get(bench_results_key, None)
+    if results is not None and results.missing:
+        terminalreporter.write_line(f"No benchmark baseline {config.getoption('--bench-baseline')}: the benchmarks "
+                                    f"were measured but skipped (store one with `make bench_baseline`)", yellow=True)
+    elif results is not None and results.uncompared:
+        terminalreporter.write_line(f"Not in the baseline, not compared (update it with --bench-save-baseline): "
+                                    f"{', '.join(sorted(results.uncompared))}", yellow=True)
@@ -0,0 +1,102 @@
+""" Time to ingest and merge the results of regressions of different sizes (synthetic sim directories) """
+import itertools
+import os
+import re
+import pytest
+from coverage_merge import tree_merge
+from verif_dashboard import ResultsIndex, get_test_metrics
+
+NUM_FILES = [10, 1000, 10000]
+TESTCASES_PER_FILE = 3
+COVERAGE_POINTS = 200
+# Merging UCIS databases is much slower per file than merging code coverage
+NUM_FUNC_COV_FILES = [10, 100, 1000]
+
+
+def write_results_file(path, seed):
+    cases = []
+    for i in range(TESTCASES_PER_FILE):
+        failure = '<failure message="Mismatch" />' if (seed + i) % 17 == 0 else ""
+        cases.append(f'<testcase name="Test{i}" classname="tests.simple_test" time="{seed % 7 + 0.5}">'
+                     f'{failure}</testcase>')
+    with open(path, "w") as fp:
+        fp.write(f'<testsuites name="results"><testsuite name="all" package="all">{"".join(cases)}'
+                 f'</testsuite></testsuites>\n')
+
+
+def write_code_cov_file(path, seed):
+    with open(path, "w") as fp:
+        fp.write("# SystemC::Coverage-3\n")
+        for point in range(COVERAGE_POINTS):
+            fp.write(f"C '\x01f\x02rtl/dut.sv\x01l\x02{point}\x01page\x02v_line/alu\x01o\x02block' "
+                     f"{(seed * point) % 5}\n")
+
+
+def func_cov_template(path):
+    """UCIS XML of the native coverage engine (same layout as pyvsc's) after a few random items"""
+    pytest.importorskip("ucis")
+    np = pytest.importorskip("numpy")
+    from ucis.xml.xml_factory import XmlFactory
+    from env.coverage import AluCoverage
+    coverage = AluCoverage()
+    rng = np.random.default_rng(1)
+    coverage.sample_batch(rng.integers(0, 6, 100), rng.integers(0, 256, 100), rng.integers(0, 256, 100))
+    XmlFactory.write(coverage.to_ucis(), path)
+    with open(path) as fp:
+        return fp.read()
+
+
+def write_func_cov_file(path, template, seed):
+    """The template with different bin counts for every seed"""
+    index = itertools.count()
+    with open(path, "w") as fp:
+        fp.write(re.sub(r'coverageCount="\d+"', lambda _: f'coverageCount="{(seed * next(index)) % 3}"', template))
+
+
+@pytest.fixture(scope="module", params=NUM_FILES, ids=lambda n: f"{n}_files")
+def sim_dir(request, tmp_path_factory):
+    """A sim directory with the results and code coverage files of a regression of n tests"""
+    path = tmp_path_factory.mktemp(f"sim_{request.param}")
+    for seed in range(request.param):
+        prefix = os.path.join(path, f"simple_test_{seed}_verilator")
+        write_results_file(f"{prefix}_results.xml", seed)
+        write_code_cov_file(f"{prefix}_code_cov.dat", seed)
+    return str(path)
+
+
+def num_files(sim_dir):
+    return len([name for name in os.listdir(sim_dir) if name.endswith("_results.xml")])
+
+
+def test_parse_results(benchmark, sim_dir):
+    """Full ingestion: every results file is new"""
+    def parse():
+        get_test_metrics(sim_dir, ResultsIndex(":memory:"))
+    benchmark(parse, num_files(sim_dir))
+
+
+def test_rescan_results(benchmark, sim_dir):
+    """Incremental ingestion: no results file changed since the last dashboard"""
+    index = ResultsIndex(":memory:")
+    get_test_metrics(sim_dir, index)
+    benchmark(lambda: get_test_metrics(sim_dir, index), num_files(sim_dir))
+
+
+def test_merge_code_coverage(benchmark, sim_dir):
+    paths = sorted(os.path.join(sim_dir, name) for name in os.listdir(sim_dir) if name.endswith("_code_cov.dat"))
+    benchmark(lambda: tree_merge("code", paths), len(paths))
+
+
+@pytest.fixture(scope="module", params=NUM_FUNC_COV_FILES, ids=lambda n: f"{n}_files")
+def func_cov_paths(request, tmp_path_factory):
+    """The functional coverage (UCIS XML) files of a regression of n tests"""
+    path = tmp_path_factory.mktemp(f"func_cov_{request.param}")
+    template = func_cov_template(os.path.join(path, "template.xml"))
+    paths = [os.path.join(path, f"simple_test_{seed}_verilator_func_cov.xml") for seed in range(request.param)]
+    for seed, file_path in enumerate(paths):
+        write_func_cov_file(file_path, template, seed)
+    return paths
+
+
+def test_merge_functional_coverage(benchmark, func_cov_paths):
+    benchmark(lambda: tree_merge("func", func_cov_paths), len(func_cov_paths))
@@ -0,0 +1,55 @@
+"""
+End-to-end throughput (transactions per second through driver, DUT and monitor) at several
+sequence lengths. Each run replays a synthetic recording with replay_test under Verilator,
+with PROFILE_EN=1: the throughput is taken from the test's <prefix>_perf.json, so the
+simulator build and start-up are not counted.
+"""
+import glob
+import json
+import os
+import shutil
+import numpy as np
+import pytest
+
+simulator = pytest.importorskip("cocotb_test.simulator")
+if shutil.which("verilator") is None:
+    pytest.skip("Verilator is not installed", allow_module_level=True)
+
+from env.recorder import RECORD_DTYPE, TxnSource, write_records  # noqa: E402
+from env.utils import AluOp  # noqa: E402
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SEQUENCE_LENGTHS = [100, 1000, 10000]
+
+
+def random_records(n, seed=1):
+    """n random driven transactions (a recording that replay_test can replay)"""
+    rng = np.random.default_rng(seed)
+    records = np.zeros(n, dtype=RECORD_DTYPE)
+    records["source"] = TxnSource.DRIVER
+    records["opcode"] = rng.choice([op.value for op in AluOp], n)
+    records["a"] = rng.integers(0, 256, n)
+    records["b"] = rng.integers(1, 256, n)  # No division by zero
+    return records
+
+
+@pytest.fixture(scope="module")
+def sim_build(tmp_path_factory):
+    """Build directory shared by all runs: the simulator is compiled once"""
+    return str(tmp_path_factory.mktemp("sim_build"))
+
+
+@pytest.mark.parametrize("length", SEQUENCE_LENGTHS)
+def test_end_to_end(benchmark, sim_build, tmp_path, length):
+    replay_file = str(tmp_path / "bench_txns.bin")
+    write_records(replay_file, random_records(length))
+    prefix = f"bench_{length}"
+    simulator.run(simulator="verilator", toplevel="alu", module="tests.replay_test",
+                  verilog_sources=sorted(glob.glob(os.path.join(ROOT_DIR, "rtl", "*.sv"))),
+                  python_search=[os.path.join(ROOT_DIR, "tb")], sim_build=sim_build, work_dir=str(tmp_path),
+                  seed=1, extra_env={"REPLAY_FILE": replay_file, "PROFILE_EN": "1", "TXN_RECORD": "0",
+                                     "OUT_NAME_PREFIX": prefix})
+    with open(tmp_path / f"{prefix}_perf.json") as fp:
+        perf = json.load(fp)
+    assert perf["transactions"] == length
+    benchmark.record(perf["transactions"], perf["wall_time"])
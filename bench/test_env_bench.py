@@ -0,0 +1,117 @@
+""" Throughput of the per-transaction testbench code: randomization, coverage sampling and checking """
+import pytest
+
+pytest.importorskip("pyuvm")
+pytest.importorskip("vsc")
+
+from random import Random  # noqa: E402
+import time  # noqa: E402
+from env.env import AluScoreboard, AluTxn, AluTxnRecord  # noqa: E402
+from env.vsc_coverage import AluCovGroup  # noqa: E402
+from env.recorder import TxnRecorder  # noqa: E402
+from env.utils import AluOp, alu_ref_model  # noqa: E402
+import numpy as np  # noqa: E402
+
+NUM_ITEMS = 10000
+# The bulk path of the sequences must draw items at least this many times faster than randomize()
+MIN_BULK_SPEEDUP = 2
+
+
+class RngParent:
+    """Stands in for the sequence that owns the items"""
+    def __init__(self, seed=1):
+        self.rng = Random(seed)
+
+
+@pytest.fixture(scope="module")
+def items():
+    """Random items with their expected results"""
+    parent = RngParent()
+    items = [AluTxn("item", parent) for _ in range(NUM_ITEMS)]
+    for item in items:
+        item.randomize()
+    results = alu_ref_model(np.array([item.opcode.value for item in items], dtype=np.uint64),
+                            np.array([item.a for item in items], dtype=np.uint64),
+                            np.array([item.b for item in items], dtype=np.uint64))
+    for item, result in zip(items, results):
+        item.result = int(result)
+    return items
+
+
+def test_randomize(benchmark):
+    item = AluTxn("item", RngParent())
+
+    def randomize():
+        for _ in range(NUM_ITEMS):
+            item.randomize()
+    benchmark(randomize, NUM_ITEMS)
+
+
+def test_rnd_operands(benchmark):
+    item = AluTxn("item", RngParent(), opcode=AluOp.ADD)
+
+    def rnd_operands():
+        for _ in range(NUM_ITEMS):
+            item.rnd_operands()
+    benchmark(rnd_operands, NUM_ITEMS)
+
+
+def test_random_batch(benchmark):
+    rng = np.random.default_rng(1)
+    benchmark(lambda: AluTxn.random_batch(rng, NUM_ITEMS), NUM_ITEMS)
+
+
+def best_time(func, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def test_random_records(benchmark, request):
+    """Bulk path of the sequences: pooled records drawn in a batch and released by the driver"""
+    repeat = request.config.getoption("--bench-repeat")
+    rng = np.random.default_rng(1)
+    item = AluTxn("item", RngParent())
+
+    def randomize():
+        for _ in range(NUM_ITEMS):
+            item.randomize()
+
+    def random_records():
+        for record in AluTxnRecord.random_batch(rng, NUM_ITEMS):
+            record.release()
+    per_item, bulk = best_time(randomize, repeat), best_time(random_records, repeat)
+    assert bulk * MIN_BULK_SPEEDUP <= per_item, \
+        f"Bulk randomization is only {per_item / bulk:.1f}x faster than randomize() (expected {MIN_BULK_SPEEDUP}x)"
+    benchmark.record(NUM_ITEMS, bulk)
+
+
+def test_covgroup_sample(benchmark, items):
+    cov_group = AluCovGroup()
+
+    def sample():
+        for item in items:
+            cov_group.alu_txn = item
+            cov_group.sample()
+    benchmark(sample, len(items))
+
+
+@pytest.mark.parametrize("batch_size", [8, 64, 1024])
+def test_scoreboard_check(benchmark, items, batch_size, monkeypatch):
+    monkeypatch.setenv("SB_BATCH_SIZE", str(batch_size))
+    # There is no simulator outside cocotb: the recorder stamps the records with sim time 0
+    monkeypatch.setattr("env.recorder.get_sim_time", lambda units: 0)
+    scoreboard = AluScoreboard(f"scoreboard_{batch_size}", None)
+    scoreboard.remove_streaming_handler()
+    scoreboard.recorder = TxnRecorder()  # Ring buffer only: no file is written
+
+    def check():
+        # Same path as the monitor: pooled records written to the scoreboard, which releases them
+        for item in items:
+            scoreboard.write(AluTxnRecord.from_item(item))
+        scoreboard.check_queue()
+    benchmark(check, len(items))
+    assert scoreboard.mismatches == 0
@@ -0,0 +1,47 @@
+"""
+Start-up cost of a simulation: time to import each tests.<TEST> module in a fresh interpreter,
+as cocotb does once per simulator process. A test fails if the import takes longer than
+--import-budget, or if it loads the coverage stack (pyvsc, pyucis) although coverage is off.
+"""
+import json
+import os
+import subprocess
+import sys
+import pytest
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TB_DIR = os.path.join(ROOT_DIR, "tb")
+# Modules that cocotb loads as MODULE=tests.<TEST> (not the shared base test and sequences)
+TEST_MODULES = sorted(os.path.splitext(name)[0] for name in os.listdir(os.path.join(TB_DIR, "tests"))
+                      if name.endswith(".py") and name not in ("__init__.py", "base_test.py", "sequences.py"))
+COVERAGE_MODULES = ("vsc", "ucis")
+
+IMPORT_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+import tests.{module}
+print(json.dumps({{"seconds": time.perf_counter() - start,
+                  "loaded": [name for name in {coverage_modules!r} if name in sys.modules]}}))
+"""
+
+
+def import_time(module):
+    """(seconds, coverage modules loaded) of importing tests.<module> in a new interpreter"""
+    env = {**os.environ, "PYTHONPATH": TB_DIR}
+    env.pop("COVERAGE_EN", None)
+    output = subprocess.check_output(
+        [sys.executable, "-c", IMPORT_SCRIPT.format(module=module, coverage_modules=COVERAGE_MODULES)],
+        cwd=TB_DIR, env=env, text=True)
+    result = json.loads(output.strip().splitlines()[-1])
+    return result["seconds"], result["loaded"]
+
+
+@pytest.mark.parametrize("module", TEST_MODULES)
+def test_import_time(benchmark, request, module):
+    measurements = [import_time(module) for _ in range(request.config.getoption("--bench-repeat"))]
+    seconds = min(seconds for seconds, _ in measurements)
+    loaded = measurements[0][1]
+    assert not loaded, f"tests.{module} imports {', '.join(loaded)} with coverage disabled"
+    budget = request.config.getoption("--import-budget")
+    assert seconds <= budget, f"tests.{module} takes {seconds:.3f}s to import (budget {budget:.3f}s)"
+    benchmark.record(1, seconds)
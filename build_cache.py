@@ -0,0 +1,184 @@
+""" Content-addressed cache of compiled simulators shared by tests, seeds and regression workers """
+
+import argparse
+import fcntl
+import glob
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import time
+from contextlib import contextmanager
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+# Make variables that change the compiled simulator (see cocotb.mk). Runtime-only variables such as
+# PLUSARGS, SEED or TEST are deliberately left out so that all tests and seeds share one build.
+COMPILE_VARS = ("WAVES", "COVERAGE_EN", "EXTRA_ARGS", "LANES")
+# Command printing the version of each simulator
+SIM_VERSION_CMDS = {
+    "verilator": ["verilator", "--version"],
+    "icarus": ["iverilog", "-V"],
+}
+
+
+class BuildError(Exception):
+    """Raised when compiling a simulator for the cache fails"""
+
+
+def tool_version(cmd):
+    """Return the first line printed by a version command, or "unknown" if the tool is missing"""
+    try:
+        output = subprocess.run(cmd, capture_output=True, text=True).stdout
+    except FileNotFoundError:
+        return "unknown"
+    return output.strip().splitlines()[0] if output.strip() else "unknown"
+
+
+class BuildCache:
+    """
+    Cache of simulator builds keyed by a hash of everything that affects compilation: the RTL sources,
+    the toplevel, the simulator (and cocotb) version and the compile-time make variables.
+    - A matching build is reused read-only: jobs hold a shared lock on it while simulating.
+    - On a miss the build is compiled once, under an exclusive lock, while other jobs wait for it.
+    - At most max_entries builds are kept; the least recently used idle ones are evicted.
+    """
+
+    def __init__(self, cache_dir, max_entries=4):
+        self.cache_dir = os.path.abspath(cache_dir)
+        self.max_entries = max_entries
+        self._versions = {}
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def config(self, sim="verilator", make_vars=None, toplevel=None, sources=None):
+        """Describe a build: only what affects compilation ends up in the configuration"""
+        make_vars = make_vars or {}
+        if sources is None:
+            sources = sorted(glob.glob(os.path.join(ROOT_DIR, "rtl", "*.sv")))
+        if toplevel is None:
+            # Same default as the Makefile: several lanes need the multi-lane wrapper
+            toplevel = "alu" if str(make_vars.get("LANES", "1")) == "1" else "alu_lanes"
+        return {
+            "sim": sim,
+            "toplevel": make_vars.get("TOPLEVEL", toplevel),
+            "sources": sources,
+            "compile_vars": {var: str(make_vars[var]) for var in COMPILE_VARS if make_vars.get(var) not in (None, "")},
+        }
+
+    def _sim_version(self, sim):
+        if sim not in self._versions:
+            self._versions[sim] = (tool_version(SIM_VERSION_CMDS.get(sim, [sim, "--version"])),
+                                   tool_version(["cocotb-config", "--version"]))
+        return self._versions[sim]
+
+    def key(self, config):
+        """Hash of the source contents, toplevel, simulator/cocotb versions and compile variables"""
+        digest = hashlib.sha256()
+        for path in config["sources"]:
+            digest.update(os.path.basename(path).encode())
+            with open(path, "rb") as fp:
+                digest.update(hashlib.sha256(fp.read()).digest())
+        description = {k: v for k, v in config.items() if k != "sources"}
+        description["versions"] = self._sim_version(config["sim"])
+        digest.update(json.dumps(description, sort_keys=True).encode())
+        return digest.hexdigest()[:16]
+
+    def _entry(self, key):
+        return os.path.join(self.cache_dir, key)
+
+    def _is_complete(self, key):
+        return os.path.isfile(os.path.join(self._entry(key), ".complete"))
+
+    def _lock_file(self, key, kind):
+        # Lock files live next to (not inside) the entry so that evicting the entry keeps them valid
+        return open(os.path.join(self.cache_dir, f"{key}.{kind}.lock"), "a")
+
+    def _compile(self, key, config):
+        """Compile the build of an entry. Must be called with the entry's build lock held."""
+        entry = self._entry(key)
+        shutil.rmtree(entry, ignore_errors=True)
+        os.makedirs(entry)
+        cmd = ["make", "--no-print-directory", "-C", ROOT_DIR, "build", f"SIM={config['sim']}",
+               f"TOPLEVEL={config['toplevel']}", f"SIM_DIR={entry}", f"SIM_BUILD_CACHE={os.path.join(entry, 'build')}"]
+        cmd += [f"{var}={value}" for var, value in config["compile_vars"].items()]
+        with open(os.path.join(entry, "build.log"), "w") as log:
+            result = subprocess.run(cmd, stdout=log, stderr=subprocess.STDOUT)
+        if result.returncode != 0:
+            raise BuildError(f"Build {key} failed, see {os.path.join(entry, 'build.log')}")
+        with open(os.path.join(entry, "config.json"), "w") as fp:
+            json.dump(config, fp, indent=2)
+        # Written last: an entry without it is an interrupted build and gets recompiled
+        open(os.path.join(entry, ".complete"), "w").close()
+
+    def _evict(self):
+        """Remove the least recently used builds above max_entries that no job is using"""
+        entries = [key for key in os.listdir(self.cache_dir)
+                   if os.path.isdir(self._entry(key)) and self._is_complete(key)]
+        entries.sort(key=lambda key: os.path.getmtime(os.path.join(self._entry(key), ".complete")))
+        for key in entries[:max(0, len(entries) - self.max_entries)]:
+            with self._lock_file(key, "use") as use_lock, self._lock_file(key, "build") as build_lock:
+                try:
+                    fcntl.flock(use_lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    fcntl.flock(build_lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    continue  # In use or being rebuilt
+                shutil.rmtree(self._entry(key), ignore_errors=True)
+
+    @contextmanager
+    def use(self, config):
+        """
+        Context manager yielding the SIM_BUILD directory of a build matching config, compiling it on a miss.
+        The build must not be modified while in use (the Makefile runs it with `make -o <executable>`).
+        """
+        key = self.key(config)
+        while True:
+            if not self._is_complete(key):
+                with self._lock_file(key, "build") as build_lock:
+                    fcntl.flock(build_lock, fcntl.LOCK_EX)
+                    # Another job may have compiled it while we were waiting for the lock
+                    if not self._is_complete(key):
+                        self._compile(key, config)
+                self._evict()
+            use_lock = self._lock_file(key, "use")
+            fcntl.flock(use_lock, fcntl.LOCK_SH)
+            # The entry may have been evicted between compiling and locking it
+            if self._is_complete(key):
+                break
+            use_lock.close()
+        try:
+            # Mark as recently used for the LRU eviction
+            os.utime(os.path.join(self._entry(key), ".complete"))
+            yield os.path.join(self._entry(key), "build")
+        finally:
+            use_lock.close()
+
+    def entries(self):
+        """Return (key, config, last used timestamp) of all complete builds, most recently used first"""
+        result = []
+        for key in os.listdir(self.cache_dir):
+            if os.path.isdir(self._entry(key)) and self._is_complete(key):
+                with open(os.path.join(self._entry(key), "config.json")) as fp:
+                    config = json.load(fp)
+                result.append((key, config, os.path.getmtime(os.path.join(self._entry(key), ".complete"))))
+        return sorted(result, key=lambda entry: entry[2], reverse=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect or clear the compiled-simulator cache")
+    parser.add_argument("--cache-dir", default=os.path.join(ROOT_DIR, "sim", "build_cache"),
+                        help="Build cache directory (default: sim/build_cache)")
+    parser.add_argument("--clear", action="store_true", help="Remove all cached builds")
+
+    args = parser.parse_args()
+
+    if args.clear:
+        shutil.rmtree(args.cache_dir, ignore_errors=True)
+        print(f"Cleared {args.cache_dir}")
+        return
+    for key, config, last_used in BuildCache(args.cache_dir).entries():
+        used = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(last_used))
+        print(f"{key}  {config['sim']:10s} {config['toplevel']:10s} {config['compile_vars']}  (last used {used})")
+
+# When the script is run directly, invoke the main function
+if __name__ == "__main__":
+    main()
@@ -25,14 +25,33 @@ ifeq ($(SIM), verilator)
         EXTRA_ARGS += --coverage-line --coverage-toggle --coverage-underscore
         PLUSARGS +=  +verilator+coverage+file+$(OUT_NAME_PREFIX)_code_cov.dat
     endif
-    # Verilator needs to recompile if the COVERAGE_EN option is changed
-    CUSTOM_COMPILE_DEPS += VAR_CACHE_COVERAGE_EN
 endif
 
-# Both Icarus and Verilator need to recompile if the WAVES option is changed
-CUSTOM_COMPILE_DEPS += VAR_CACHE_WAVES
+# Multi-lane toplevel (rtl/alu_lanes.sv): set its number of lanes
+ifneq ($(LANES),1)
+    ifeq ($(SIM), verilator)
+        COMPILE_ARGS += -GN_LANES=$(LANES)
+    else
+        COMPILE_ARGS += -P$(TOPLEVEL).N_LANES=$(LANES)
+    endif
+endif
+
+ifeq ($(SIM_BUILD_CACHE),)
+    # Verilator needs to recompile if the COVERAGE_EN option is changed
+    ifeq ($(SIM), verilator)
+        CUSTOM_COMPILE_DEPS += VAR_CACHE_COVERAGE_EN
+    endif
+    # Both Icarus and Verilator need to recompile if the WAVES option or the number of lanes is changed
+    CUSTOM_COMPILE_DEPS += VAR_CACHE_WAVES VAR_CACHE_LANES
+    # Build directory: sim_build_<SIM>_<"cov"/"">
+    SIM_BUILD = sim_build_$(SIM)$(if $(filter 1,$(COVERAGE_EN)),_cov,)
+else
+    # Build directory from build_cache.py: one directory per build configuration, so no variable cache files needed
+    SIM_BUILD = $(SIM_BUILD_CACHE)
+endif
 
-# Build directory: sim_build_<SIM>_<"cov"/"">
-SIM_BUILD = sim_build_$(SIM)$(if $(filter 1,$(COVERAGE_EN)),_cov,)
+include $(shell cocotb-config --makefiles)/Makefile.sim
 
-include $(shell cocotb-config --makefiles)/Makefile.sim
\ No newline at end of file
+# Compile the simulator without running any test
+.PHONY: build
+build: $(SIM_BUILD)/$(SIM_EXECUTABLE)
\ No newline at end of file
@@ -0,0 +1,187 @@
+""" Merges code (Verilator .dat) and functional (UCIS XML) coverage databases in-process, in parallel """
+
+import argparse
+import glob
+import os
+import subprocess
+from concurrent.futures import ProcessPoolExecutor
+
+# First line of a Verilator coverage point file
+DAT_HEADER = b"# SystemC::Coverage-3\n"
+# Below this many files, merging in the current process is faster than starting a pool
+PARALLEL_MERGE_MIN_FILES = 8
+
+
+def read_dat(path):
+    """Read a Verilator coverage file into an ordered {point key: count} dictionary"""
+    counts = {}
+    with open(path, "rb") as fp:
+        for line in fp:
+            # Point lines look like: C '<key>' <count>
+            if not line.startswith(b"C '"):
+                continue
+            key, count = line[3:].rstrip(b"\n").rsplit(b"' ", 1)
+            counts[key] = counts.get(key, 0) + int(count)
+    return counts
+
+
+def merge_dat(counts_list):
+    """Sum the counts of the same coverage points. Reuses (modifies) the first dictionary."""
+    merged = counts_list[0]
+    for counts in counts_list[1:]:
+        for key, count in counts.items():
+            merged[key] = merged.get(key, 0) + count
+    return merged
+
+
+def write_dat(counts, path):
+    """Write merged counts in Verilator's coverage file format"""
+    with open(path, "wb") as fp:
+        fp.write(DAT_HEADER)
+        for key, count in counts.items():
+            fp.write(b"C '" + key + b"' " + str(count).encode() + b"\n")
+
+
+def read_ucis(path):
+    """Read a UCIS XML file into an in-memory database"""
+    from ucis.xml.xml_reader import XmlReader
+    return XmlReader().read(path)
+
+
+def merge_ucis(dbs):
+    """Merge UCIS databases into a new in-memory database"""
+    from ucis.mem.mem_factory import MemFactory
+    from ucis.merge.db_merger import DbMerger
+    if len(dbs) == 1:
+        return dbs[0]
+    merged = MemFactory.create()
+    DbMerger().merge(merged, dbs)
+    return merged
+
+
+# Reader and merger of each kind of coverage database
+MERGERS = {
+    "code": (read_dat, merge_dat),
+    "func": (read_ucis, merge_ucis),
+}
+
+
+def _merge_files(kind, paths):
+    """Leaf of the merge tree: read a chunk of files and merge them"""
+    read, merge = MERGERS[kind]
+    return merge([read(path) for path in paths])
+
+
+def _merge_pair(kind, first, second):
+    """Inner node of the merge tree"""
+    return MERGERS[kind][1]([first, second])
+
+
+def tree_merge(kind, paths, workers=None):
+    """
+    Merge coverage files ("code" .dat or "func" UCIS XML) with a parallel tree reduction:
+    each worker first merges a chunk of files, then the partial results are merged pairwise,
+    level by level, until one database remains. Returns the merged database (None if no paths).
+    """
+    if not paths:
+        return None
+    workers = workers or os.cpu_count()
+    if workers <= 1 or len(paths) < PARALLEL_MERGE_MIN_FILES:
+        return _merge_files(kind, paths)
+    num_chunks = min(len(paths), 2 * workers)
+    chunks = [paths[i::num_chunks] for i in range(num_chunks)]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        level = list(pool.map(_merge_files, [kind] * len(chunks), chunks))
+        while len(level) > 1:
+            pairs = [pool.submit(_merge_pair, kind, level[i], level[i + 1]) for i in range(0, len(level) - 1, 2)]
+            # An odd one out goes up to the next level as is
+            level = [pair.result() for pair in pairs] + level[len(pairs) * 2:]
+    return level[0]
+
+
+def merge_code_coverage(paths, output, workers=None):
+    """Merge Verilator .dat files into output. Returns the merged {point: count} dictionary."""
+    counts = tree_merge("code", paths, workers)
+    write_dat(counts, output)
+    return counts
+
+
+def merge_functional_coverage(paths, output=None, workers=None):
+    """Merge UCIS XML files (optionally written to output). Returns the merged in-memory database."""
+    db = tree_merge("func", paths, workers)
+    if output is not None:
+        from ucis.xml.xml_factory import XmlFactory
+        XmlFactory.write(db, output)
+    return db
+
+
+def functional_coverage(db):
+    """Total coverage (%) of an in-memory UCIS database"""
+    from ucis.report.coverage_report_builder import CoverageReportBuilder
+    return CoverageReportBuilder.build(db).coverage
+
+
+def write_functional_report(db, output):
+    """Write the detailed text report of an in-memory UCIS database"""
+    from ucis.report.coverage_report_builder import CoverageReportBuilder
+    from ucis.report.text_coverage_report_formatter import TextCoverageReportFormatter
+    with open(output, "w") as fp:
+        formatter = TextCoverageReportFormatter(CoverageReportBuilder.build(db), fp)
+        formatter.details = True
+        formatter.report()
+
+
+def write_code_html(dat_file, html_dir):
+    """Generate the code coverage HTML report of a (merged) .dat file with genhtml"""
+    info_file = os.path.splitext(dat_file)[0] + ".info"
+    subprocess.run(["verilator_coverage", dat_file, "--write-info", info_file], check=True)
+    subprocess.run(["genhtml", info_file, "--legend", "--show-details", "--branch-coverage",
+                    "--output-directory", html_dir], check=True, stdout=subprocess.DEVNULL)
+
+
+def coverage_files(sim_dir, pattern):
+    """Per-test coverage files of a sim directory (merged files excluded)"""
+    return sorted(path for path in glob.glob(os.path.join(sim_dir, pattern))
+                  if not os.path.basename(path).startswith("merged_"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Merge the coverage of all tests and generate the coverage reports")
+    parser.add_argument("--sim-dir", default="sim",
+                        help="Directory containing simulation results (default: sim)")
+    parser.add_argument("--out-dir", default=None,
+                        help="Report directory (default: <sim-dir>/coverage_report)")
+    parser.add_argument("--jobs", type=int, default=0,
+                        help="Number of parallel merge processes (default: number of CPUs)")
+    parser.add_argument("--no-html", action="store_true",
+                        help="Do not generate the code coverage HTML report")
+
+    args = parser.parse_args()
+
+    out_dir = args.out_dir or os.path.join(args.sim_dir, "coverage_report")
+    os.makedirs(out_dir, exist_ok=True)
+    workers = args.jobs or os.cpu_count()
+
+    dat_files = coverage_files(args.sim_dir, "*_code_cov.dat")
+    if dat_files:
+        merged_dat = os.path.join(out_dir, "code_cov.dat")
+        merge_code_coverage(dat_files, merged_dat, workers)
+        print(f"Merged {len(dat_files)} code coverage files into {merged_dat}")
+        if not args.no_html:
+            write_code_html(merged_dat, os.path.join(out_dir, "code_cov_html"))
+            print(f"Code coverage HTML report: {os.path.join(out_dir, 'code_cov_html', 'index.html')}")
+    else:
+        print("Warning: No .dat coverage files found")
+
+    xml_files = coverage_files(args.sim_dir, "*_func_cov.xml")
+    if xml_files:
+        db = merge_functional_coverage(xml_files, os.path.join(out_dir, "func_cov.xml"), workers)
+        write_functional_report(db, os.path.join(out_dir, "func_cov.log"))
+        print(f"Merged {len(xml_files)} functional coverage files: {functional_coverage(db):.2f}% "
+              f"(report: {os.path.join(out_dir, 'func_cov.log')})")
+    else:
+        print("Warning: No functional coverage XML files found")
+
+# When the script is run directly, invoke the main function
+if __name__ == "__main__":
+    main()
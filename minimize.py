@@ -0,0 +1,168 @@
+""" Shrinks the transaction stream of a failing test to a short failing case by replaying subsets of it """
+
+import argparse
+import os
+import shutil
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from build_cache import BuildCache
+from regression import Job, run_job
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(ROOT_DIR, "tb"))
+from env.recorder import TxnSource, TxnStatus, read_records, driven_records, write_records  # noqa: E402
+
+
+class ReplayJob(Job):
+    """A replay_test run of one candidate stream (see tb/tests/replay_test.py)"""
+
+    def __init__(self, index, replay_file, sim="verilator"):
+        super().__init__("replay_test", index, sim)
+        self.replay_file = replay_file
+
+    @property
+    def make_vars(self):
+        return super().make_vars + [f"REPLAY_FILE={self.replay_file}"]
+
+
+def first_failure(records):
+    """Index (in the driven stream, all lanes) of the first transaction the scoreboards flagged, or None"""
+    # Each lane's scoreboard checks the items of its lane in the order in which they were driven on
+    # it, but the lanes' batches are not checked in the driven order: map the first mismatch of each
+    # lane (its index on the lane) to its position in the driven stream, as failure_window does
+    driven = driven_records(records)
+    checked = records[records["source"] == TxnSource.SCOREBOARD]
+    first = None
+    for lane in sorted(set(checked["lane"].tolist())):
+        failed = (checked[checked["lane"] == lane]["status"] == TxnStatus.FAIL).nonzero()[0]
+        positions = (driven["lane"] == lane).nonzero()[0]
+        if len(failed) and failed[0] < len(positions):
+            position = int(positions[failed[0]])
+            first = position if first is None else min(first, position)
+    return first
+
+
+class Minimizer:
+    """
+    Replays candidate subsets of a transaction stream, several at a time on a pool of
+    simulators, and remembers which ones still fail (a FAIL status, not a timeout or error).
+    """
+
+    def __init__(self, records, work_dir, num_workers, timeout, make_vars, sim="verilator", build_cache=None):
+        self.records = records
+        self.work_dir = work_dir
+        self.num_workers = num_workers
+        self.timeout = timeout
+        self.make_vars = make_vars
+        self.sim = sim
+        self.build_cache = build_cache
+        self.results = {}  # Candidate (tuple of indices) -> still fails
+        self.runs = 0
+
+    def fails(self, candidates):
+        """Return for each candidate (a list of record indices) whether replaying it still fails"""
+        todo = list(dict.fromkeys(tuple(c) for c in candidates if tuple(c) not in self.results))
+        jobs = []
+        for candidate in todo:
+            self.runs += 1
+            replay_file = os.path.join(self.work_dir, f"candidate_{self.runs}_txns.bin")
+            write_records(replay_file, self.records[list(candidate)])
+            jobs.append(ReplayJob(self.runs, replay_file, self.sim))
+        with ThreadPoolExecutor(max_workers=self.num_workers) as pool:
+            done = list(pool.map(lambda job: run_job(job, self.work_dir, self.timeout, self.make_vars,
+                                                     build_cache=self.build_cache), jobs))
+        for candidate, job in zip(todo, done):
+            self.results[candidate] = job.status == "FAIL"
+            print(f"   {len(candidate):6d} transactions: {'FAIL' if job.status == 'FAIL' else job.status}")
+        return [self.results[tuple(c)] for c in candidates]
+
+    def shortest_prefix(self, length):
+        """
+        Shortest failing prefix of the first `length` transactions (which must fail), found with a
+        parallel k-ary search: every round tests num_workers prefix lengths at once.
+        """
+        low, high = 0, length  # prefix[:low] passes (or is untested), prefix[:high] fails
+        while high - low > 1:
+            step = max(1, (high - low) // (self.num_workers + 1))
+            lengths = list(range(low + step, high, step))[:self.num_workers]
+            results = self.fails([range(n) for n in lengths])
+            failing = [n for n, failed in zip(lengths, results) if failed]
+            passing = [n for n, failed in zip(lengths, results) if not failed]
+            if failing:
+                high = min(failing)
+            low = max([n for n in passing if n < high], default=low)
+        return high
+
+    def ddmin(self, indices):
+        """Delta debugging: a failing subset of indices that fails no more if any chunk of it is removed"""
+        n = 2
+        while len(indices) >= 2:
+            size = len(indices)
+            chunks = [indices[i * size // n:(i + 1) * size // n] for i in range(n)]
+            complements = [indices[:i * size // n] + indices[(i + 1) * size // n:] for i in range(n)] if n > 2 else []
+            results = self.fails(chunks + complements)
+            failing = [i for i, failed in enumerate(results) if failed]
+            if failing and failing[0] < n:
+                indices, n = chunks[failing[0]], 2
+            elif failing:
+                indices, n = complements[failing[0] - n], max(n - 1, 2)
+            elif n >= size:
+                break
+            else:
+                n = min(2 * n, size)
+        return indices
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Minimize the transaction stream of a failing test")
+    parser.add_argument("recording", help="Recording of the failing run (<prefix>_txns.bin)")
+    parser.add_argument("--output", default=None,
+                        help="Minimized recording (default: <sim-dir>/minimized_txns.bin)")
+    parser.add_argument("--jobs", type=int, default=0,
+                        help="Number of parallel simulations (default: number of CPUs)")
+    parser.add_argument("--timeout", type=float, default=600,
+                        help="Per-run timeout in seconds (default: 600)")
+    parser.add_argument("--sim", default="verilator", help="Simulator (default: verilator)")
+    parser.add_argument("--sim-dir", default=os.path.join(ROOT_DIR, "sim"),
+                        help="Directory for the replay runs (in <sim-dir>/minimize) (default: sim)")
+    parser.add_argument("--no-ddmin", action="store_true",
+                        help="Stop at the shortest failing prefix")
+    parser.add_argument("make_vars", nargs="*", metavar="VAR=VALUE",
+                        help="Extra variables passed to every `make sim`, e.g. STREAMING=1")
+
+    args = parser.parse_args()
+
+    recorded = read_records(args.recording)
+    records = driven_records(recorded)
+    sim_dir = os.path.abspath(args.sim_dir)
+    work_dir = os.path.join(sim_dir, "minimize")
+    shutil.rmtree(work_dir, ignore_errors=True)
+    os.makedirs(work_dir)
+    num_workers = args.jobs or os.cpu_count()
+    build_cache = BuildCache(os.path.join(sim_dir, "build_cache"))
+    minimizer = Minimizer(records, work_dir, num_workers, args.timeout, args.make_vars, args.sim, build_cache)
+
+    # Nothing after the first flagged transaction is needed to reproduce it
+    failure = first_failure(recorded)
+    length = len(records) if failure is None else failure + 1
+    print(f"Checking that the first {length} of {len(records)} transactions fail")
+    if not minimizer.fails([range(length)])[0]:
+        print("The replayed transactions do not fail: nothing to minimize")
+        sys.exit(1)
+    print("Searching the shortest failing prefix")
+    length = minimizer.shortest_prefix(length)
+    indices = list(range(length))
+    if not args.no_ddmin:
+        print(f"Delta debugging {length} transactions")
+        indices = minimizer.ddmin(indices)
+
+    output = args.output or os.path.join(sim_dir, "minimized_txns.bin")
+    write_records(output, records[indices])
+    print("=" * 50)
+    print(f"Minimized {len(records)} transactions to {len(indices)} in {minimizer.runs} runs: {output}")
+    print(f"Re-simulate with waves: make sim TEST=replay_test REPLAY_FILE={os.path.abspath(output)} WAVES=1")
+    print("=" * 50)
+
+# When the script is run directly, invoke the main function
+if __name__ == "__main__":
+    main()
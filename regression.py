@@ -0,0 +1,425 @@
+""" Runs a regression list in parallel: one `make sim` per (test, seed) job on a pool of workers """
+
+import argparse
+import glob
+import json
+import os
+import shutil
+import signal
+import subprocess
+import sys
+import time
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from build_cache import BuildCache, BuildError
+from scheduler import RuntimeHistory, Scheduler
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+# Files collected from each job's working directory into the sim directory (the layout verif_dashboard.py reads)
+COLLECT_PATTERNS = ["*_results.xml", "*_code_cov.dat", "*_func_cov.xml", "*_txns.bin", "*_perf.json", "*_dut_stats.json",
+                    "*_failure.json",
+                    "*.log", "*.fst"]
+
+
+class Job:
+    """A single simulation: one test module run with one seed in its own working directory"""
+
+    def __init__(self, test, seed, sim="verilator"):
+        self.test = test
+        self.seed = seed
+        self.sim = sim
+        self.status = None
+        self.runtime = 0.0
+
+    @property
+    def prefix(self):
+        """Same `<TEST>_<SEED>_<SIM>` convention as OUT_NAME_PREFIX in the Makefile"""
+        return f"{self.test}_{self.seed}_{self.sim}"
+
+    @property
+    def make_vars(self):
+        """Job-specific variables for `make sim`"""
+        return [f"TEST={self.test}", f"SEED={self.seed}", f"SIM={self.sim}"]
+
+    @property
+    def timeout_scale(self):
+        """Number of tests run by the job (the per-job timeout is per test)"""
+        return 1
+
+    @property
+    def entries(self):
+        """(test, seed) entries run by the job"""
+        return [(self.test, self.seed)]
+
+    def __repr__(self):
+        return self.prefix
+
+
+class BatchJob(Job):
+    """Several (test, seed) entries run back to back in one simulator process (see tb/tests/batch.py)"""
+
+    def __init__(self, index, entries, sim="verilator"):
+        super().__init__("batch", index, sim)
+        self._entries = entries
+
+    @property
+    def entries(self):
+        return self._entries
+
+    @property
+    def make_vars(self):
+        batch_tests = " ".join(f"{test}:{seed}" for test, seed in self.entries)
+        return super().make_vars + [f"BATCH_TESTS={batch_tests}"]
+
+    @property
+    def timeout_scale(self):
+        return len(self.entries)
+
+
+class WaveJob(Job):
+    """
+    Re-run of a failure with waves: replay_test re-drives the transactions the failing (test, seed)
+    recorded, only in a window around the failing one, on a traced build (WAVES=1). The outputs are
+    named <test>_<seed>_<sim>_window_* (found by `make view_waves TEST=<test> SEED=<seed>`); without a
+    recording, the whole test is re-run with the same seed.
+    """
+    collect_patterns = ["*.fst", "*.log"]  # Not the results: the dashboard must not count the re-run
+
+    def __init__(self, test, seed, sim="verilator", replay_file=None, start=0, stop=0):
+        super().__init__(test, seed, sim)
+        self.replay_file = replay_file
+        self.start = start
+        self.stop = stop
+
+    @property
+    def prefix(self):
+        return f"{self.test}_{self.seed}_{self.sim}_window"
+
+    @property
+    def make_vars(self):
+        make_vars = [f"SEED={self.seed}", f"SIM={self.sim}", f"OUT_NAME_PREFIX={self.prefix}", "WAVES=1"]
+        if self.replay_file is None:
+            return [f"TEST={self.test}"] + make_vars
+        return ["TEST=replay_test"] + make_vars + [f"REPLAY_FILE={self.replay_file}", f"REPLAY_START={self.start}",
+                                                   f"REPLAY_STOP={self.stop}"]
+
+    @property
+    def entries(self):
+        return []  # Not a regression entry (its failure description must stay)
+
+
+def make_jobs(tests, seeds, sim="verilator", batch_size=1):
+    """One job per (test, seed), or batches of up to batch_size (test, seed) entries per simulator process"""
+    entries = [(test, seed) for test in tests for seed in seeds]
+    if batch_size <= 1:
+        return [Job(test, seed, sim) for test, seed in entries]
+    return [BatchJob(index, entries[i:i + batch_size], sim)
+            for index, i in enumerate(range(0, len(entries), batch_size))]
+
+
+def read_test_list(list_file):
+    """Read a regression list (one test per line, '#' starts a comment line)"""
+    with open(list_file) as fp:
+        return [line.strip() for line in fp if line.strip() and not line.startswith("#")]
+
+
+def parse_seeds(spec):
+    """Parse a seed specification such as "1", "1-100" or "1,5,7-9" into a list of seeds"""
+    seeds = []
+    for part in str(spec).split(","):
+        part = part.strip()
+        if not part:
+            continue
+        if "-" in part:
+            first, last = part.split("-", 1)
+            seeds.extend(range(int(first), int(last) + 1))
+        else:
+            seeds.append(int(part))
+    return seeds
+
+
+def write_failure_results(results_file, job, message):
+    """
+    Write a cocotb-style results file for a job that produced none, so the dashboard counts it as failed.
+    A batch gets one failing testcase per entry, named after the entry's <test>_<seed>_<sim> prefix
+    like the testcases of tb/tests/batch.py, so the runtime history records every entry as failing.
+    """
+    testsuites = ET.Element("testsuites", name="results")
+    testsuite = ET.SubElement(testsuites, "testsuite", name="all", package="all")
+    if isinstance(job, BatchJob):
+        runtime = job.runtime / len(job.entries)
+        testcases = [(f"{test}_{seed}_{job.sim}_{test}", runtime) for test, seed in job.entries]
+    else:
+        testcases = [(job.test, job.runtime)]
+    for name, runtime in testcases:
+        testcase = ET.SubElement(testsuite, "testcase", name=name, classname=job.prefix, time=f"{runtime:.3f}")
+        ET.SubElement(testcase, "failure", message=message)
+    ET.ElementTree(testsuites).write(results_file)
+
+
+def results_status(results_file):
+    """Return "PASS"/"FAIL" from a cocotb results file, or None if there is none"""
+    if not os.path.isfile(results_file):
+        return None
+    try:
+        root = ET.parse(results_file).getroot()
+    except ET.ParseError:
+        return None
+    testcases = root.findall(".//testcase")
+    if not testcases:
+        return None
+    failed = any(tc.find("failure") is not None or tc.find("error") is not None for tc in testcases)
+    return "FAIL" if failed else "PASS"
+
+
+def collect_outputs(work_dir, sim_dir, patterns=COLLECT_PATTERNS):
+    """Move the job's results, coverage databases, logs and waves into the shared sim directory"""
+    for pattern in patterns:
+        for path in glob.glob(os.path.join(work_dir, pattern)):
+            os.replace(path, os.path.join(sim_dir, os.path.basename(path)))
+
+
+def parse_make_vars(make_vars):
+    """Turn ["VAR=VALUE", ...] into a dictionary"""
+    return dict(var.split("=", 1) for var in make_vars)
+
+
+def run_make(cmd, out_file, timeout):
+    """Run a make command, killing it (with all its children) on timeout. Returns the exit code or None on timeout."""
+    with open(out_file, "w") as out:
+        # New session -> the whole process group (make, simulator) can be killed on timeout
+        proc = subprocess.Popen(cmd, stdout=out, stderr=subprocess.STDOUT, start_new_session=True)
+        try:
+            return proc.wait(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            os.killpg(proc.pid, signal.SIGKILL)
+            proc.wait()
+            return None
+
+
+def run_job(job, sim_dir, timeout, make_vars, keep_work_dirs=False, build_cache=None):
+    """
+    Run one job with its own SIM_DIR and OUT_NAME_PREFIX and kill it (with all its
+    children) if it exceeds the timeout. Outputs are collected into sim_dir.
+    With a build cache, the job runs a shared prebuilt simulator instead of compiling its own.
+    """
+    work_dir = os.path.join(sim_dir, "jobs", job.prefix)
+    shutil.rmtree(work_dir, ignore_errors=True)
+    os.makedirs(work_dir)
+    # A failure description left by an earlier run would be taken for this run's
+    for test, seed in job.entries:
+        failure_file = os.path.join(sim_dir, f"{test}_{seed}_{job.sim}_failure.json")
+        if os.path.isfile(failure_file):
+            os.remove(failure_file)
+    cmd = ["make", "--no-print-directory", "-C", ROOT_DIR, "sim", f"SIM_DIR={work_dir}"] + job.make_vars + list(make_vars)
+    timeout = timeout * job.timeout_scale
+    out_file = os.path.join(work_dir, "make.out")
+    start = time.monotonic()
+    returncode = build_failure = None
+    if build_cache is None:
+        returncode = run_make(cmd, out_file, timeout)
+    else:
+        try:
+            with build_cache.use(build_cache.config(job.sim, parse_make_vars(make_vars))) as build_dir:
+                start = time.monotonic()  # Waiting for a build is not part of the job's runtime
+                returncode = run_make(cmd + [f"SIM_BUILD_CACHE={build_dir}"], out_file, timeout)
+        except BuildError as e:
+            build_failure = str(e)
+    timed_out = returncode is None and build_failure is None
+    job.runtime = time.monotonic() - start
+
+    results_file = os.path.join(work_dir, f"{job.prefix}_results.xml")
+    if build_failure is not None:
+        job.status = "ERROR"
+        write_failure_results(results_file, job, build_failure)
+        with open(out_file, "w") as out:
+            out.write(build_failure + "\n")
+    elif timed_out:
+        job.status = "TIMEOUT"
+        write_failure_results(results_file, job, f"Timeout after {timeout}s")
+    else:
+        job.status = results_status(results_file)
+        if job.status is None:
+            job.status = "ERROR"
+            write_failure_results(results_file, job, f"No results produced (make exited with {returncode})")
+
+    # Keep the make output next to the simulation log for failing jobs
+    if job.status != "PASS":
+        os.replace(os.path.join(work_dir, "make.out"), os.path.join(work_dir, f"{job.prefix}_make.log"))
+    collect_outputs(work_dir, sim_dir, getattr(job, "collect_patterns", COLLECT_PATTERNS))
+    if not keep_work_dirs:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return job
+
+
+def run_regression(jobs, sim_dir, num_workers, timeout, make_vars, keep_work_dirs=False, build_cache=None,
+                   max_failures=0, history=None):
+    """
+    Run all jobs on a pool of num_workers workers, in the given order. Returns the jobs with their status filled in.
+    With max_failures > 0, the jobs that did not start yet are skipped once that many jobs did not pass
+    (running jobs finish). Finished jobs are recorded in the runtime history, if any.
+    """
+    os.makedirs(sim_dir, exist_ok=True)
+    print(f"Running {len(jobs)} jobs on {num_workers} workers (timeout {timeout}s per job)")
+    done = failures = 0
+    # Each worker thread only waits on its simulator subprocess. Jobs start in submission order.
+    with ThreadPoolExecutor(max_workers=num_workers) as pool:
+        futures = {pool.submit(run_job, job, sim_dir, timeout, make_vars, keep_work_dirs, build_cache): job
+                   for job in jobs}
+        for future in as_completed(futures):
+            if future.cancelled():
+                continue
+            job = future.result()
+            done += 1
+            print(f"[{done}/{len(jobs)}] {job.status:7s} {job.prefix} ({job.runtime:.1f}s)")
+            if history is not None:
+                history.add_results(job, os.path.join(sim_dir, f"{job.prefix}_results.xml"))
+            if job.status == "PASS":
+                continue
+            failures += 1
+            if failures == max_failures:
+                skipped = [futures[f] for f in futures if f.cancel()]
+                for skipped_job in skipped:
+                    skipped_job.status = "SKIPPED"
+                print(f"Stopping after {failures} failures: {len(skipped)} jobs skipped")
+    if history is not None:
+        history.commit()
+    return jobs
+
+
+def failure_window(records, lane, index, window):
+    """
+    Range [start, stop) of the driven records (all lanes) around the index-th transaction driven on a lane,
+    with `window` transactions of that lane before and after it
+    """
+    positions = (records["lane"] == lane).nonzero()[0]
+    if index >= len(positions):
+        return 0, len(records)
+    first = positions[max(0, index - window)]
+    last = positions[min(len(positions) - 1, index + window)]
+    return int(first), int(last) + 1
+
+
+def wave_jobs(jobs, sim_dir, window):
+    """A WaveJob for the first mismatch of every failing entry (described by its <prefix>_failure.json)"""
+    sys.path.insert(0, os.path.join(ROOT_DIR, "tb"))
+    from env.recorder import driven_records, read_records
+    reruns = []
+    for job in jobs:
+        if job.status != "FAIL":
+            continue
+        for test, seed in job.entries:
+            prefix = f"{test}_{seed}_{job.sim}"
+            failure_file = os.path.join(sim_dir, f"{prefix}_failure.json")
+            if not os.path.isfile(failure_file):
+                continue  # Failed without a scoreboard mismatch (e.g. an exception): nothing to window
+            with open(failure_file) as fp:
+                failure = json.load(fp)
+            replay_file = os.path.join(sim_dir, f"{prefix}_txns.bin")
+            if not os.path.isfile(replay_file):
+                reruns.append(WaveJob(test, seed, job.sim))  # No recording (TXN_RECORD=0): full re-run
+                continue
+            start, stop = failure_window(driven_records(read_records(replay_file)), failure["lane"],
+                                         failure["index"], window)
+            reruns.append(WaveJob(test, seed, job.sim, replay_file, start, stop))
+    return reruns
+
+
+def rerun_with_waves(jobs, sim_dir, num_workers, timeout, make_vars, build_cache=None, window=20):
+    """
+    Re-run the failures of a regression run without tracing on a traced build, each only in a window
+    of transactions around its first mismatch. Returns the WaveJobs.
+    """
+    reruns = wave_jobs(jobs, sim_dir, window)
+    if not reruns:
+        return reruns
+    # Same variables as the regression, but a traced build
+    make_vars = [var for var in make_vars if not var.startswith("WAVES=")] + ["WAVES=1"]
+    print(f"Re-running {len(reruns)} failures with waves ({window} transactions before and after the mismatch)")
+    with ThreadPoolExecutor(max_workers=num_workers) as pool:
+        done = pool.map(lambda job: run_job(job, sim_dir, timeout, make_vars, build_cache=build_cache), reruns)
+        for job in done:
+            result = "reproduced" if job.status == "FAIL" else f"not reproduced ({job.status})"
+            print(f"   {job.test} seed {job.seed}: {result}, waves: {job.prefix}_waves.fst "
+                  f"(make view_waves TEST={job.test} SEED={job.seed})")
+    return reruns
+
+
+def print_summary(jobs):
+    """Print the per-status job count and the failing jobs"""
+    print("=" * 50)
+    for status in ("PASS", "FAIL", "TIMEOUT", "ERROR", "SKIPPED"):
+        print(f"   {status:8s} {sum(job.status == status for job in jobs)}")
+    failing = [job for job in jobs if job.status not in ("PASS", "SKIPPED")]
+    for job in failing:
+        print(f"   {job.status}: {job.prefix} (log: {job.prefix}.log)")
+    print("=" * 50)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a regression list in parallel")
+    parser.add_argument("--list", default=os.path.join(ROOT_DIR, "tb", "tests", "regression.txt"),
+                        help="Regression list file (default: tb/tests/regression.txt)")
+    parser.add_argument("--seeds", default="1",
+                        help="Seeds to run every test with, e.g. 1, 1-100 or 1,5,7-9 (default: 1)")
+    parser.add_argument("--jobs", type=int, default=0,
+                        help="Number of parallel simulations (default: number of CPUs)")
+    parser.add_argument("--timeout", type=float, default=600,
+                        help="Per-job timeout in seconds (default: 600)")
+    parser.add_argument("--sim", default="verilator", help="Simulator (default: verilator)")
+    parser.add_argument("--sim-dir", default=os.path.join(ROOT_DIR, "sim"),
+                        help="Directory collecting the results of all jobs (default: sim)")
+    parser.add_argument("--batch-size", type=int, default=1,
+                        help="Run up to this many (test, seed) entries back to back in one simulator process (default: 1)")
+    parser.add_argument("--keep-work-dirs", action="store_true",
+                        help="Keep the per-job working directories under <sim-dir>/jobs")
+    parser.add_argument("--build-cache", default=os.path.join(ROOT_DIR, "sim", "build_cache"),
+                        help="Directory of the compiled-simulator cache shared by all jobs (default: sim/build_cache)")
+    parser.add_argument("--max-builds", type=int, default=4,
+                        help="Maximum number of compiled simulators kept in the build cache (default: 4)")
+    parser.add_argument("--no-build-cache", action="store_true",
+                        help="Let every job compile its own simulator in its working directory")
+    parser.add_argument("--history", default=os.path.join(ROOT_DIR, "sim", "runtime_history.db"),
+                        help="Runtime history of previous regressions used to order the jobs (default: sim/runtime_history.db)")
+    parser.add_argument("--no-schedule", action="store_true",
+                        help="Run the jobs in list order instead of previously failing/changed first, longest first")
+    parser.add_argument("--smoke", action="store_true",
+                        help="Only run the previously failing seeds and the changed or never-run tests")
+    parser.add_argument("--changed-since", default="HEAD",
+                        help="Git revision against which tests count as changed (default: HEAD = uncommitted changes)")
+    parser.add_argument("--max-failures", type=int, default=0,
+                        help="Skip the remaining jobs after this many failures (default: 0 = run all)")
+    parser.add_argument("--waves-on-failure", action="store_true",
+                        help="Re-run every failure on a traced build, in a window around its first mismatch")
+    parser.add_argument("--wave-window", type=int, default=20,
+                        help="Transactions traced before and after the mismatch (default: 20)")
+    parser.add_argument("make_vars", nargs="*", metavar="VAR=VALUE",
+                        help="Extra variables passed to every `make sim`, e.g. WAVES=1 COVERAGE_EN=1")
+
+    args = parser.parse_args()
+
+    tests = read_test_list(args.list)
+    jobs = make_jobs(tests, parse_seeds(args.seeds), args.sim, args.batch_size)
+    num_workers = args.jobs or os.cpu_count()
+    build_cache = None if args.no_build_cache else BuildCache(args.build_cache, args.max_builds)
+    sim_dir = os.path.abspath(args.sim_dir)
+    os.makedirs(os.path.dirname(os.path.abspath(args.history)), exist_ok=True)
+    history = RuntimeHistory(args.history)
+    if not history.runtimes(args.sim) and os.path.isdir(sim_dir):
+        history.ingest(sim_dir)  # First scheduled regression: start from the results already in the sim directory
+    if not args.no_schedule:
+        scheduled = Scheduler(history, args.sim, args.changed_since).order(jobs, args.smoke)
+        if args.smoke:
+            print(f"Smoke run: {len(scheduled)} of {len(jobs)} jobs (previously failing, changed or never run)")
+        jobs = scheduled
+    run_regression(jobs, sim_dir, num_workers, args.timeout, args.make_vars,
+                   args.keep_work_dirs, build_cache, args.max_failures, history)
+    history.close()
+    if args.waves_on_failure:
+        rerun_with_waves(jobs, sim_dir, num_workers, args.timeout, args.make_vars, build_cache, args.wave_window)
+    print_summary(jobs)
+    sys.exit(0 if all(job.status == "PASS" for job in jobs) else 1)
+
+# When the script is run directly, invoke the main function
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+// N_LANES independent ALUs (alu in dut.sv) sharing one clock and reset, so that one simulation
+// runs N_LANES streams of transactions. Lane i's interface is in the lane[i] generate scope,
+// with the same signal names as the ports of alu (the testbench drives and samples them there).
+module alu_lanes #(
+    parameter int N_LANES = 4
+) (
+    input  logic        clk_i,
+    input  logic        arst_n_i
+);
+
+    for (genvar i = 0; i < N_LANES; i++) begin : lane
+        // Input interface
+        logic        valid_i;
+        logic        ready_o;
+        logic [31:0] a_i;
+        logic [31:0] b_i;
+        logic [3:0]  opcode_i;
+        // Output interface
+        logic        valid_o;
+        logic        ready_i;
+        logic [31:0] result_o;
+
+        alu u_alu (
+            .clk_i    (clk_i),
+            .arst_n_i (arst_n_i),
+            .valid_i  (valid_i),
+            .ready_o  (ready_o),
+            .a_i      (a_i),
+            .b_i      (b_i),
+            .opcode_i (opcode_i),
+            .valid_o  (valid_o),
+            .ready_i  (ready_i),
+            .result_o (result_o)
+        );
+    end
+
+endmodule
@@ -30,7 +30,7 @@ module alu(
                 ready_o <= 1'b1; // Ready to accept new input
                 valid_o <= 1'b0; // Output consumed
             end else begin // No input or output
-                ready_o <= 1'b1;
+                ready_o <= !valid_o; // Not ready while the output waits for ready_i
             end
         end
     end
@@ -51,11 +51,11 @@ module alu(
         endcase
     end
 
-    // Result register
+    // Result register: captured with the input, held until the output is consumed
     always_ff @(posedge clk_i or negedge arst_n_i) begin
         if (!arst_n_i) begin
             result_reg <= '0;
-        end else begin
+        end else if (valid_i && ready_o) begin
             result_reg <= res;
         end
     end
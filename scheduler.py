@@ -0,0 +1,176 @@
+""" Orders regression jobs from their runtime history: previously failing and changed tests first, longest first """
+
+import os
+import sqlite3
+import subprocess
+import time
+import xml.etree.ElementTree as ET
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def testcase_times(results_file):
+    """[(testcase name, time, failed)] of a cocotb results file (the `time` attribute the dashboard sums up)"""
+    testcases = []
+    for _, elem in ET.iterparse(results_file):
+        if elem.tag != "testcase":
+            continue
+        try:
+            runtime = float(elem.get("time", "0.0"))
+        except ValueError:
+            runtime = 0.0
+        failed = elem.find("failure") is not None or elem.find("error") is not None
+        testcases.append((elem.get("name", ""), runtime, failed))
+        elem.clear()
+    return testcases
+
+
+class RuntimeHistory:
+    """
+    On-disk (SQLite) history of the (test, seed, sim) jobs of previous regressions: runtime,
+    status and time of the last run. The runtime is the `time` of the testcases in the job's
+    cocotb results file, the same attribute the dashboard sums up.
+    """
+
+    def __init__(self, db_file):
+        self.db = sqlite3.connect(db_file)
+        self.db.execute("""
+            CREATE TABLE IF NOT EXISTS history (
+                test TEXT, seed INTEGER, sim TEXT, runtime REAL, status TEXT, last_run REAL,
+                PRIMARY KEY (test, seed, sim))""")
+
+    def add(self, test, seed, sim, runtime, status, last_run=None):
+        self.db.execute("INSERT OR REPLACE INTO history VALUES (?, ?, ?, ?, ?, ?)",
+                        (test, seed, sim, runtime, status, last_run or time.time()))
+
+    def add_results(self, job, results_file):
+        """
+        Record a finished job from its results file. The entries of a batch job are recorded
+        separately: their testcases are named after their <test>_<seed>_<sim> prefix.
+        """
+        try:
+            testcases = testcase_times(results_file)
+        except (OSError, ET.ParseError):
+            testcases = []
+        if job.entries == [(job.test, job.seed)]:
+            runtime = sum(runtime for _, runtime, _ in testcases) or job.runtime
+            self.add(job.test, job.seed, job.sim, runtime, job.status)
+            return
+        for test, seed in job.entries:
+            prefix = f"{test}_{seed}_{job.sim}_"
+            results = [(runtime, failed) for name, runtime, failed in testcases if name.startswith(prefix)]
+            if results:
+                self.add(test, seed, job.sim, sum(runtime for runtime, _ in results),
+                         "FAIL" if any(failed for _, failed in results) else "PASS")
+
+    def ingest(self, sim_dir):
+        """Seed the history from the <test>_<seed>_<sim>_results.xml files of a previous regression"""
+        for name in os.listdir(sim_dir):
+            if not name.endswith("_results.xml"):
+                continue
+            path = os.path.join(sim_dir, name)
+            try:
+                test, seed, sim = name[:-len("_results.xml")].rsplit("_", 2)
+                if test == "batch":
+                    continue  # Recorded per entry when the batch job finishes
+                testcases = testcase_times(path)
+                self.add(test, int(seed), sim, sum(runtime for _, runtime, _ in testcases),
+                         "FAIL" if any(failed for _, _, failed in testcases) else "PASS", os.path.getmtime(path))
+            except (ValueError, OSError, ET.ParseError):
+                continue  # Not a <test>_<seed>_<sim> results file
+
+    def runtimes(self, sim):
+        """{(test, seed): runtime} of all recorded jobs of a simulator"""
+        return {(test, seed): runtime for test, seed, runtime in
+                self.db.execute("SELECT test, seed, runtime FROM history WHERE sim = ?", (sim,))}
+
+    def failing(self, sim):
+        """(test, seed) of the jobs whose last run did not pass"""
+        return {(test, seed) for test, seed in
+                self.db.execute("SELECT test, seed FROM history WHERE sim = ? AND status != 'PASS'", (sim,))}
+
+    def last_runs(self, sim):
+        """{test: time of its most recent run}"""
+        return dict(self.db.execute("SELECT test, MAX(last_run) FROM history WHERE sim = ? GROUP BY test", (sim,)))
+
+    def commit(self):
+        self.db.commit()
+
+    def close(self):
+        self.db.commit()
+        self.db.close()
+
+
+def changed_tests(tests, since="HEAD"):
+    """
+    Tests whose module (tb/tests/<test>.py) differs from the git revision `since`
+    (default: uncommitted changes). Returns an empty set outside a git checkout.
+    """
+    try:
+        output = subprocess.check_output(["git", "diff", "--name-only", since, "--", "tb/tests"],
+                                         cwd=ROOT_DIR, text=True, stderr=subprocess.DEVNULL)
+    except (subprocess.CalledProcessError, FileNotFoundError):
+        return set()
+    changed = {os.path.splitext(os.path.basename(path))[0] for path in output.split()}
+    return {test for test in tests if test in changed}
+
+
+class Scheduler:
+    """
+    Orders jobs (Job or BatchJob from regression.py) to get a red/green signal early and to
+    minimize the makespan on a worker pool:
+    - priority jobs first: seeds that failed last time, tests whose module changed since
+      the revision `changed_since`, tests modified after their last run, and never-run tests
+    - within each group, longest estimated runtime first (LPT), so that the long jobs do not
+      end up alone on the pool at the end of the regression.
+    A job's runtime is estimated from its own history, else from the average of its test's
+    seeds, else as the longest known runtime (unknown jobs are started early).
+    """
+
+    def __init__(self, history, sim="verilator", changed_since="HEAD"):
+        self.history = history
+        self.sim = sim
+        self.changed_since = changed_since
+        self.runtimes = history.runtimes(sim)
+        self.test_runtimes = {}
+        for (test, _), runtime in self.runtimes.items():
+            self.test_runtimes.setdefault(test, []).append(runtime)
+        self.default_runtime = max(self.runtimes.values(), default=0.0)
+
+    def estimate(self, test, seed):
+        """Estimated runtime of one (test, seed) entry"""
+        if (test, seed) in self.runtimes:
+            return self.runtimes[(test, seed)]
+        runtimes = self.test_runtimes.get(test)
+        return sum(runtimes) / len(runtimes) if runtimes else self.default_runtime
+
+    def job_estimate(self, job):
+        return sum(self.estimate(test, seed) for test, seed in job.entries)
+
+    def priority_entries(self, tests):
+        """(test, seed) entries, or tests (any seed), that are run first"""
+        failing = self.history.failing(self.sim)
+        last_runs = self.history.last_runs(self.sim)
+        tests = set(tests)
+        changed = changed_tests(tests, self.changed_since)
+        for test in tests:
+            module = os.path.join(ROOT_DIR, "tb", "tests", f"{test}.py")
+            if test not in last_runs or (os.path.isfile(module) and os.path.getmtime(module) > last_runs[test]):
+                changed.add(test)
+        return failing, changed
+
+    def order(self, jobs, smoke=False):
+        """
+        Return the jobs in scheduling order: priority jobs first, each group longest first.
+        With smoke=True only the priority jobs are returned.
+        """
+        failing, changed = self.priority_entries({test for job in jobs for test, _ in job.entries})
+
+        def is_priority(job):
+            return any((test, seed) in failing or test in changed for test, seed in job.entries)
+
+        priority = sorted((job for job in jobs if is_priority(job)), key=self.job_estimate, reverse=True)
+        if smoke:
+            return priority
+        rest = sorted((job for job in jobs if not is_priority(job)), key=self.job_estimate, reverse=True)
+        return priority + rest
@@ -0,0 +1,333 @@
+""" Runs a seed sweep of one test in shards and aggregates compact per-seed summaries as they stream in """
+
+import argparse
+import json
+import os
+import shlex
+import shutil
+import subprocess
+import sys
+import time
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from build_cache import BuildCache
+from regression import Job, collect_outputs, parse_seeds, run_job
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+# Every seed collects functional coverage (its bins hit are summarized); no transaction recording by default
+DEFAULT_MAKE_VARS = ["COVERAGE_EN=1", "COVERAGE_ENGINE=native", "TXN_RECORD=0"]
+CONFIG_FILE = "sweep.json"
+BINS_FILE = "bins.json"  # Names of all bins, written once by the first shard that reads a coverage database
+
+
+def shard_seeds(seeds, shard, num_shards):
+    """Seeds of one shard: every num_shards-th seed, so every shard covers the whole range"""
+    return seeds[shard::num_shards]
+
+
+def read_bins(func_cov_file):
+    """{coverpoint or cross: {bin: count}} of a UCIS XML functional coverage database"""
+    bins = {}
+    point = None
+    for event, elem in ET.iterparse(func_cov_file, events=("start", "end")):
+        if event == "start":
+            if elem.tag in ("coverpoint", "cross"):
+                point = bins.setdefault(elem.get("name"), {})
+            continue
+        if elem.tag in ("coverpointBin", "crossBin") and point is not None:
+            contents = elem.find(".//contents")
+            point[elem.get("name")] = int(contents.get("coverageCount", "0")) if contents is not None else 0
+        elif elem.tag == "cgInstance":
+            elem.clear()
+    return bins
+
+
+def summarize(job, sim_dir, shard):
+    """
+    Compact summary of a finished seed (status, runtime, bins hit and number of bins of each
+    coverpoint), and the names of all bins of its coverage database (None without one)
+    """
+    summary = {"test": job.test, "seed": job.seed, "status": job.status, "runtime": round(job.runtime, 3),
+               "shard": shard, "hit": [], "bins": {}}
+    func_cov_file = os.path.join(sim_dir, f"{job.prefix}_func_cov.xml")
+    try:
+        bins = read_bins(func_cov_file)
+    except (OSError, ET.ParseError):
+        return summary, None
+    for point, point_bins in bins.items():
+        summary["bins"][point] = len(point_bins)
+        summary["hit"].extend(f"{point}/{name}" for name, count in point_bins.items() if count)
+    return summary, [f"{point}/{name}" for point, point_bins in bins.items() for name in point_bins]
+
+
+def write_bin_names(sweep_dir, names):
+    """Write the names of all bins to the sweep directory, unless another shard already did"""
+    path = os.path.join(sweep_dir, BINS_FILE)
+    if names is None or os.path.isfile(path):
+        return
+    tmp_file = f"{path}.{os.getpid()}"
+    with open(tmp_file, "w") as fp:
+        json.dump(names, fp)
+    os.replace(tmp_file, path)
+
+
+def coverage_percent(hit, bins):
+    """Coverage of a set of hit '<coverpoint>/<bin>' names: average of the coverpoints' hit ratios"""
+    if not bins:
+        return 0.0
+    hits = {point: 0 for point in bins}
+    for name in hit:
+        point = name.split("/", 1)[0]
+        if point in hits:
+            hits[point] += 1
+    return 100 * sum(hits[point] / total for point, total in bins.items() if total) / len(bins)
+
+
+def run_shard(sweep_dir, shard):
+    """
+    Run the seeds of one shard (what a worker process or host runs) and append the summary of
+    every finished seed to <sweep-dir>/shard<N>.jsonl. Seeds already summarized are skipped, so
+    a shard can be restarted. The raw outputs of passing seeds are deleted; those of failing
+    seeds are kept in <sweep-dir>/failures.
+    """
+    with open(os.path.join(sweep_dir, CONFIG_FILE)) as fp:
+        config = json.load(fp)
+    shard_dir = os.path.join(sweep_dir, f"shard{shard}")
+    failures_dir = os.path.join(sweep_dir, "failures")
+    os.makedirs(shard_dir, exist_ok=True)
+    summary_file = os.path.join(sweep_dir, f"shard{shard}.jsonl")
+    done = set()
+    if os.path.isfile(summary_file):
+        with open(summary_file) as fp:
+            done = {json.loads(line)["seed"] for line in fp if line.endswith("\n")}
+    seeds = [seed for seed in shard_seeds(parse_seeds(config["seeds"]), shard, config["shards"]) if seed not in done]
+    build_cache = BuildCache(config["build_cache"], config["max_builds"]) if config["build_cache"] else None
+    jobs = [Job(config["test"], seed, config["sim"]) for seed in seeds]
+    # JOBS=0: share the CPUs of this host between the shards it runs
+    num_workers = config["jobs"] or max(1, (os.cpu_count() or 1) // config["shards_per_host"])
+    print(f"Shard {shard}: {len(jobs)} seeds ({len(done)} already done), {num_workers} jobs")
+    with ThreadPoolExecutor(max_workers=num_workers) as pool, open(summary_file, "a") as out:
+        futures = [pool.submit(run_job, job, shard_dir, config["timeout"], config["make_vars"],
+                               build_cache=build_cache) for job in jobs]
+        for future in as_completed(futures):
+            job = future.result()
+            # One line per seed, flushed at once: the aggregator reads the file while it grows
+            summary, bin_names = summarize(job, shard_dir, shard)
+            out.write(json.dumps(summary) + "\n")
+            out.flush()
+            write_bin_names(sweep_dir, bin_names)
+            if job.status != "PASS":
+                os.makedirs(failures_dir, exist_ok=True)
+                collect_outputs(shard_dir, failures_dir, [f"{job.prefix}*"])
+            for name in os.listdir(shard_dir):
+                if name.startswith(f"{job.prefix}_") or name.startswith(f"{job.prefix}."):
+                    os.remove(os.path.join(shard_dir, name))
+
+
+class SweepAggregator:
+    """
+    Folds the per-seed summaries of all shards into the sweep totals while the shards are running:
+    every call to poll() reads the lines appended to the shard files since the previous call.
+    """
+
+    def __init__(self, sweep_dir):
+        self.sweep_dir = sweep_dir
+        self.offsets = {}  # Shard file -> bytes already read
+        self.summaries = {}  # Seed -> summary (without its hit list)
+        self.seed_hits = {}  # Seed -> bins hit
+        self.hit = set()
+        self.bins = {}
+        self.status_counts = {}
+        self.runtime = 0.0
+        self.last_new_bin = 0  # Number of seeds summarized when the last new bin was hit
+
+    def poll(self):
+        """Read the new summaries. Returns the number of seeds added."""
+        added = 0
+        for name in sorted(os.listdir(self.sweep_dir)):
+            if not (name.startswith("shard") and name.endswith(".jsonl")):
+                continue
+            path = os.path.join(self.sweep_dir, name)
+            with open(path) as fp:
+                fp.seek(self.offsets.get(path, 0))
+                for line in iter(fp.readline, ""):
+                    if not line.endswith("\n"):
+                        break  # Partially written line: read it next time
+                    self.offsets[path] = fp.tell()
+                    added += self.add(json.loads(line))
+        return added
+
+    def add(self, summary):
+        seed = summary["seed"]
+        if seed in self.summaries:
+            return 0  # A restarted shard may report a seed twice
+        hit = frozenset(summary.pop("hit"))
+        self.summaries[seed] = summary
+        self.seed_hits[seed] = hit
+        self.bins.update(summary["bins"])
+        self.status_counts[summary["status"]] = self.status_counts.get(summary["status"], 0) + 1
+        self.runtime += summary["runtime"]
+        if not hit <= self.hit:
+            self.hit |= hit
+            self.last_new_bin = len(self.summaries)
+        return 1
+
+    def coverage(self):
+        return coverage_percent(self.hit, self.bins)
+
+    def curve(self):
+        """Cumulative coverage after each seed, in seed order: [(seeds, coverage, new bins)]"""
+        points = []
+        hit = set()
+        for count, seed in enumerate(sorted(self.seed_hits), 1):
+            new_bins = len(self.seed_hits[seed] - hit)
+            hit |= self.seed_hits[seed]
+            points.append((count, round(coverage_percent(hit, self.bins), 3), new_bins))
+        return points
+
+    def progress(self, total):
+        counts = ", ".join(f"{status} {count}" for status, count in sorted(self.status_counts.items()))
+        return (f"[{len(self.summaries)}/{total}] {counts}  coverage {self.coverage():.2f}% "
+                f"(last new bin after {self.last_new_bin} seeds)")
+
+    def write(self, total):
+        """Write <sweep-dir>/summary.json and the coverage-vs-seeds curve <sweep-dir>/coverage_curve.csv"""
+        curve = self.curve()
+        # Seeds (in seed order) after which the coverage no longer grew
+        saturated_at = next((count for count, coverage, _ in curve if coverage >= curve[-1][1]), 0) if self.bins else 0
+        failing = sorted(seed for seed, summary in self.summaries.items() if summary["status"] != "PASS")
+        summary = {"seeds": total, "done": len(self.summaries), "status": self.status_counts,
+                   "runtime": round(self.runtime, 3), "coverage": round(self.coverage(), 3),
+                   "bins": sum(self.bins.values()), "bins_hit": len(self.hit), "saturated_at": saturated_at,
+                   "failing_seeds": failing, "unhit": sorted(self.unhit())}
+        with open(os.path.join(self.sweep_dir, "summary.json"), "w") as fp:
+            json.dump(summary, fp, indent=2)
+        with open(os.path.join(self.sweep_dir, "coverage_curve.csv"), "w") as fp:
+            fp.write("seeds,coverage,new_bins\n")
+            fp.writelines(f"{count},{coverage},{new_bins}\n" for count, coverage, new_bins in curve)
+        return summary
+
+    def unhit(self):
+        """Names of the bins that no seed hit"""
+        path = os.path.join(self.sweep_dir, BINS_FILE)
+        if not os.path.isfile(path):
+            return set()
+        with open(path) as fp:
+            return set(json.load(fp)) - self.hit
+
+
+def print_summary(summary, curve_file):
+    print("=" * 50)
+    print(f"   Seeds:     {summary['done']}/{summary['seeds']}")
+    for status, count in sorted(summary["status"].items()):
+        print(f"   {status:8s}   {count}")
+    print(f"   Coverage:  {summary['coverage']:.2f}% ({summary['bins_hit']}/{summary['bins']} bins)")
+    print(f"   Saturated: after {summary['saturated_at']} seeds (coverage vs seeds: {curve_file})")
+    if summary["unhit"]:
+        print(f"   Unhit bins: {len(summary['unhit'])} (see summary.json)")
+    if summary["failing_seeds"]:
+        print(f"   Failing seeds: {' '.join(map(str, summary['failing_seeds']))}")
+    print("=" * 50)
+
+
+def launch_shards(sweep_dir, num_shards, hosts=()):
+    """
+    Start one process per shard: locally, or round-robin on hosts over ssh (the hosts must see this
+    checkout and the sweep directory at the same paths). Returns the processes.
+    """
+    procs = []
+    for shard in range(num_shards):
+        cmd = ["python3", os.path.join(ROOT_DIR, "sweep.py"), "shard", "--sweep-dir", sweep_dir, "--shard", str(shard)]
+        if hosts:
+            cmd = ["ssh", hosts[shard % len(hosts)], f"cd {shlex.quote(ROOT_DIR)} && {shlex.join(cmd)}"]
+        else:
+            cmd[0] = sys.executable
+        with open(os.path.join(sweep_dir, f"shard{shard}.out"), "w") as out:
+            procs.append(subprocess.Popen(cmd, stdout=out, stderr=subprocess.STDOUT))
+    return procs
+
+
+def run_sweep(args):
+    seeds = parse_seeds(args.seeds)
+    sweep_dir = os.path.abspath(args.sweep_dir or os.path.join(ROOT_DIR, "sim", f"sweep_{args.test}"))
+    if args.fresh:
+        shutil.rmtree(sweep_dir, ignore_errors=True)
+    os.makedirs(sweep_dir, exist_ok=True)
+    overrides = {var.split("=", 1)[0] for var in args.make_vars}
+    hosts = args.hosts.split(",") if args.hosts else []
+    config = {"test": args.test, "seeds": args.seeds, "shards": args.shards, "jobs": args.jobs, "sim": args.sim,
+              "timeout": args.timeout, "build_cache": None if args.no_build_cache else os.path.abspath(args.build_cache),
+              "max_builds": args.max_builds, "shards_per_host": -(-args.shards // len(hosts)) if hosts else args.shards,
+              "make_vars": [var for var in DEFAULT_MAKE_VARS if var.split("=", 1)[0] not in overrides] + args.make_vars}
+    with open(os.path.join(sweep_dir, CONFIG_FILE), "w") as fp:
+        json.dump(config, fp, indent=2)
+    print(f"Sweeping {args.test} over {len(seeds)} seeds in {args.shards} shards "
+          f"({'on ' + ', '.join(hosts) if hosts else 'locally'}, {args.jobs or 'CPUs / shards'} jobs each) -> {sweep_dir}")
+    procs = launch_shards(sweep_dir, args.shards, hosts)
+    aggregator = SweepAggregator(sweep_dir)
+    while True:
+        running = any(proc.poll() is None for proc in procs)
+        if aggregator.poll():
+            print(aggregator.progress(len(seeds)))
+        if not running:
+            break
+        time.sleep(args.poll_interval)
+    for shard, proc in enumerate(procs):
+        if proc.returncode:
+            print(f"Warning: shard {shard} exited with {proc.returncode} (see shard{shard}.out)")
+    return aggregator, len(seeds), sweep_dir
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a seed sweep of one test in shards and aggregate it")
+    commands = parser.add_subparsers(dest="command", required=True)
+    run = commands.add_parser("run", help="Run a sweep: start the shards and aggregate their summaries")
+    run.add_argument("--test", default="simple_test", help="Test module (default: simple_test)")
+    run.add_argument("--seeds", default="1-100", help="Seeds, e.g. 1-10000 or 1,5,7-9 (default: 1-100)")
+    run.add_argument("--shards", type=int, default=4, help="Number of shards, one process each (default: 4)")
+    run.add_argument("--jobs", type=int, default=0,
+                     help="Parallel simulations per shard (default: 0 = the host's CPUs shared by its shards)")
+    run.add_argument("--hosts", default="",
+                     help="Comma-separated ssh hosts sharing this directory; shards are spread over them "
+                          "(default: run the shards locally)")
+    run.add_argument("--sim", default="verilator", help="Simulator (default: verilator)")
+    run.add_argument("--timeout", type=float, default=600, help="Per-seed timeout in seconds (default: 600)")
+    run.add_argument("--sweep-dir", default=None,
+                     help="Directory of the shards' summaries and of the failing seeds' outputs (default: sim/sweep_<test>)")
+    run.add_argument("--fresh", action="store_true",
+                     help="Delete the previous sweep in the directory instead of resuming it")
+    run.add_argument("--build-cache", default=os.path.join(ROOT_DIR, "sim", "build_cache"),
+                     help="Compiled-simulator cache shared by all shards (default: sim/build_cache)")
+    run.add_argument("--max-builds", type=int, default=4,
+                     help="Maximum number of compiled simulators kept in the build cache (default: 4)")
+    run.add_argument("--no-build-cache", action="store_true", help="Let every seed compile its own simulator")
+    run.add_argument("--poll-interval", type=float, default=1.0,
+                     help="Seconds between two reads of the shards' summaries (default: 1)")
+    run.add_argument("make_vars", nargs="*", metavar="VAR=VALUE",
+                     help=f"Extra variables passed to every `make sim` (default: {' '.join(DEFAULT_MAKE_VARS)})")
+    shard = commands.add_parser("shard", help="Run one shard of a sweep (started by `run`, locally or over ssh)")
+    shard.add_argument("--sweep-dir", required=True, help="Directory of the sweep (with its sweep.json)")
+    shard.add_argument("--shard", type=int, required=True, help="Shard index")
+    report = commands.add_parser("report", help="Aggregate the summaries of a sweep directory again")
+    report.add_argument("--sweep-dir", required=True, help="Directory of the sweep (with its sweep.json)")
+
+    args = parser.parse_args()
+
+    if args.command == "shard":
+        run_shard(os.path.abspath(args.sweep_dir), args.shard)
+        return
+    if args.command == "report":
+        sweep_dir = os.path.abspath(args.sweep_dir)
+        with open(os.path.join(sweep_dir, CONFIG_FILE)) as fp:
+            total = len(parse_seeds(json.load(fp)["seeds"]))
+        aggregator = SweepAggregator(sweep_dir)
+        aggregator.poll()
+    else:
+        aggregator, total, sweep_dir = run_sweep(args)
+    summary = aggregator.write(total)
+    print_summary(summary, os.path.join(sweep_dir, "coverage_curve.csv"))
+    sys.exit(0 if summary["done"] == total and summary["status"].get("PASS", 0) == total else 1)
+
+# When the script is run directly, invoke the main function
+if __name__ == "__main__":
+    main()
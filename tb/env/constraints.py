@@ -0,0 +1,166 @@
+"""
+Declarative randomization constraints of ALU transactions: opcode weights, weighted operand
+value classes (per opcode if needed) and relations between opcode and operands. They are
+compiled once into an AluSampler that draws whole batches of (opcode, a, b) from a NumPy
+random generator, instead of one Python-level random number at a time.
+
+    constraints = (AluConstraints()
+                   .opcodes({AluOp.ADD: 4, AluOp.DIV: 1})    # Other opcodes get weight 0
+                   .operand("a", {FULL: 8, ZERO: 1, MAX: 1})
+                   .operand("b", {SMALL: 1}, opcodes=(AluOp.SL, AluOp.SR))
+                   .require(AluOp.DIV, lambda a, b: b != 0))
+    opcodes, a, b = constraints.compile(bitwidth=8).sample(np.random.default_rng(seed), 1000)
+"""
+import numpy as np
+from env.utils import AluOp
+
+# Operand value classes. A (lo, hi) tuple is a class too: uniform in [lo, hi].
+FULL = "full"  # Uniform over all values of the operand width
+ZERO = "zero"  # 0
+MAX = "max"  # All ones
+POW2 = "pow2"  # 1, 2, 4, ... up to the MSB
+SMALL = "small"  # 0..31: shift amounts that do not shift everything out
+OPERANDS = ("a", "b")
+
+
+def class_range(value_class, bitwidth: int):
+    """(lo, hi) of an operand value class; POW2 gives the range of the exponent"""
+    max_value = 2**bitwidth - 1
+    if isinstance(value_class, tuple):
+        lo, hi = value_class
+        if not 0 <= lo <= hi <= max_value:
+            raise ValueError(f"Operand range {value_class} is not within 0..{max_value}")
+        return lo, hi
+    ranges = {FULL: (0, max_value), ZERO: (0, 0), MAX: (max_value, max_value),
+              POW2: (0, bitwidth - 1), SMALL: (0, min(31, max_value))}
+    if value_class not in ranges:
+        raise ValueError(f"Unknown operand value class: {value_class!r}")
+    return ranges[value_class]
+
+
+def opcode_list(opcodes):
+    """A single opcode or an iterable of opcodes as a list (None: all opcodes)"""
+    if opcodes is None:
+        return list(AluOp)
+    if isinstance(opcodes, AluOp):
+        return [opcodes]
+    return [AluOp(op) for op in opcodes]
+
+
+class AluConstraints:
+    """
+    Constraints of the (opcode, a, b) of an AluTxn. Opcodes are drawn by weight (default:
+    uniform). Each operand draws a value class by weight, then a value uniformly within the
+    class (default: FULL). Relations (require) are predicates on the operand arrays of the
+    opcodes they apply to; draws that violate them are drawn again. The builder methods
+    modify the constraints in place and return them, copy() derives new constraints.
+    """
+    max_redraws = 100  # Redraw rounds before the relations are deemed unsatisfiable
+
+    def __init__(self):
+        self.opcode_weights = {op: 1 for op in AluOp}
+        # Operand distributions: {opcode: {value class: weight}}
+        self.operand_dists = {name: {op: {FULL: 1} for op in AluOp} for name in OPERANDS}
+        self.relations = []  # (opcodes, predicate(a, b) -> bool array)
+        self._samplers = {}  # Compiled samplers by bitwidth
+
+    def copy(self):
+        constraints = AluConstraints()
+        constraints.opcode_weights = dict(self.opcode_weights)
+        constraints.operand_dists = {name: {op: dict(dist) for op, dist in dists.items()}
+                                     for name, dists in self.operand_dists.items()}
+        constraints.relations = list(self.relations)
+        return constraints
+
+    def opcodes(self, weights):
+        """Opcode weights ({opcode: weight}); opcodes that are not listed get weight 0"""
+        self.opcode_weights = {op: weights.get(op, 0) for op in AluOp}
+        self._samplers.clear()
+        return self
+
+    def operand(self, name: str, dist, opcodes=None):
+        """Value classes of operand `name` ({class: weight}) for some opcodes (default: all)"""
+        if name not in OPERANDS:
+            raise ValueError(f"Unknown operand: {name!r}")
+        for op in opcode_list(opcodes):
+            self.operand_dists[name][op] = dict(dist)
+        self._samplers.clear()
+        return self
+
+    def require(self, opcodes, predicate):
+        """Relation that must hold for the opcodes, e.g. require(AluOp.DIV, lambda a, b: b != 0)"""
+        self.relations.append((opcode_list(opcodes), predicate))
+        self._samplers.clear()
+        return self
+
+    def compile(self, bitwidth: int):
+        """Sampler of these constraints for operands of `bitwidth` bits (compiled once per bitwidth)"""
+        if bitwidth not in self._samplers:
+            self._samplers[bitwidth] = AluSampler(self, bitwidth)
+        return self._samplers[bitwidth]
+
+
+class AluSampler:
+    """
+    Compiled AluConstraints: per opcode, the cumulative probabilities of the operand value
+    classes and their (lo, hi) ranges as arrays, so a batch is drawn with a few vectorized
+    operations whatever the number of items.
+    """
+
+    def __init__(self, constraints: AluConstraints, bitwidth: int):
+        self.bitwidth = bitwidth
+        weights = np.array([constraints.opcode_weights[op] for op in AluOp], dtype=float)
+        if (weights < 0).any() or weights.sum() <= 0:
+            raise ValueError(f"Invalid opcode weights: {constraints.opcode_weights}")
+        self.opcode_values = np.array([op.value for op in AluOp], dtype=np.int64)
+        self.opcode_cdf = np.cumsum(weights / weights.sum())
+        # Opcode value -> row of the class tables
+        self.opcode_rows = np.zeros(max(AluOp) + 1, dtype=np.int64)
+        self.opcode_rows[self.opcode_values] = np.arange(len(self.opcode_values))
+        self.operands = {name: self.compile_operand(constraints.operand_dists[name]) for name in OPERANDS}
+        self.relations = [(np.array([op.value for op in opcodes]), predicate)
+                          for opcodes, predicate in constraints.relations]
+        self.max_redraws = constraints.max_redraws
+
+    def compile_operand(self, dists):
+        """(classes, cdf per opcode row, lo, hi, is_pow2) of an operand"""
+        classes = []
+        for dist in dists.values():
+            classes.extend(value_class for value_class in dist if value_class not in classes)
+        cdf = np.zeros((len(AluOp), len(classes)))
+        for row, op in enumerate(AluOp):
+            weights = np.array([dists[op].get(value_class, 0) for value_class in classes], dtype=float)
+            if (weights < 0).any() or weights.sum() <= 0:
+                raise ValueError(f"Invalid operand weights for {op.name}: {dists[op]}")
+            cdf[row] = np.cumsum(weights / weights.sum())
+        ranges = np.array([class_range(value_class, self.bitwidth) for value_class in classes], dtype=np.int64)
+        is_pow2 = np.array([value_class == POW2 for value_class in classes])
+        return cdf, ranges[:, 0], ranges[:, 1], is_pow2
+
+    def sample_operand(self, rng: np.random.Generator, name: str, rows: np.ndarray) -> np.ndarray:
+        cdf, lo, hi, is_pow2 = self.operands[name]
+        # Class of every item: first class whose cumulative probability exceeds a uniform draw
+        draws = rng.random(len(rows))
+        classes = np.minimum((draws[:, None] >= cdf[rows]).sum(axis=1), cdf.shape[1] - 1)
+        values = rng.integers(lo[classes], hi[classes], endpoint=True)
+        return np.where(is_pow2[classes], np.left_shift(1, values), values)
+
+    def sample(self, rng: np.random.Generator, n: int):
+        """n random (opcode, a, b) as arrays of opcode values and operands"""
+        opcodes = self.opcode_values[np.minimum(np.searchsorted(self.opcode_cdf, rng.random(n), side="right"),
+                                                len(self.opcode_values) - 1)]
+        rows = self.opcode_rows[opcodes]
+        a = self.sample_operand(rng, "a", rows)
+        b = self.sample_operand(rng, "b", rows)
+        for _ in range(self.max_redraws):
+            violated = np.zeros(n, dtype=bool)
+            for relation_opcodes, predicate in self.relations:
+                applies = np.isin(opcodes, relation_opcodes)
+                violated |= applies & ~np.asarray(predicate(a, b), dtype=bool)
+            if not violated.any():
+                return opcodes, a, b
+            # Redraw the operands of the violating items (same opcode)
+            a[violated] = self.sample_operand(rng, "a", rows[violated])
+            b[violated] = self.sample_operand(rng, "b", rows[violated])
+        raise ValueError(f"Constraints are unsatisfiable: {violated.sum()} items still violate "
+                         f"a relation after {self.max_redraws} redraws")
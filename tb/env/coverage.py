@@ -0,0 +1,158 @@
+"""
+Native functional coverage engine: the bins of the pyvsc AluCovGroup kept in
+preallocated integer arrays. Selected with COVERAGE_ENGINE=native (see AluMonitor).
+"""
+import numpy as np
+from env.utils import AluOp
+
+OPERAND_BINS = ("positive", "negative", "zero")  # Same order as AluCovGroup.OperandsEnum
+POSITIVE, NEGATIVE, ZERO = range(len(OPERAND_BINS))
+
+
+def operand_class(value: int) -> int:
+    """Operand bin of a single value (same classification as AluCovGroup.operand_enum)"""
+    if value > 0:
+        return POSITIVE
+    elif value < 0:
+        return NEGATIVE
+    return ZERO
+
+
+def operand_classes(values) -> np.ndarray:
+    """Operand bins of an array of values"""
+    values = np.asarray(values)
+    return np.where(values > 0, POSITIVE, np.where(values < 0, NEGATIVE, ZERO))
+
+
+class AluCoverage:
+    """
+    Opcode, operand A, operand B and opcode x A x B cross coverage of ALU transactions,
+    with the same bins and names as AluCovGroup. Samples are counted one at a time
+    (sample) or a whole batch at once (sample_batch). Cross bins can be ignored
+    (e.g. DIV with b == 0): they are still counted but are excluded from the coverage
+    and from the reports, like pyvsc ignore bins.
+    """
+    name = "AluCovGroup"
+    opcode_name = "opcode"
+    a_name = "operand_a"
+    b_name = "operand_b"
+    cross_name = "opcode_operands_cross"
+
+    def __init__(self, ignore_div_by_zero: bool = True):
+        self.opcodes = list(AluOp)
+        self.num_opcodes = max(self.opcodes) + 1
+        self.opcode_hits = np.zeros(self.num_opcodes, dtype=np.int64)
+        self.a_hits = np.zeros(len(OPERAND_BINS), dtype=np.int64)
+        self.b_hits = np.zeros(len(OPERAND_BINS), dtype=np.int64)
+        self.cross_hits = np.zeros((self.num_opcodes, len(OPERAND_BINS), len(OPERAND_BINS)), dtype=np.int64)
+        self.cross_ignored = np.zeros(self.cross_hits.shape, dtype=bool)
+        if ignore_div_by_zero:
+            self.ignore_cross(AluOp.DIV, b=ZERO)
+
+    def ignore_cross(self, opcode: AluOp = None, a: int = None, b: int = None):
+        """Ignore the cross bins matching an opcode and/or operand bins (None matches all)"""
+        index = tuple(slice(None) if value is None else int(value) for value in (opcode, a, b))
+        self.cross_ignored[index] = True
+
+    def sample(self, opcode: int, a: int, b: int):
+        """Count one transaction"""
+        opcode = int(opcode)
+        if not 0 <= opcode < self.num_opcodes:
+            return
+        a_class = operand_class(a)
+        b_class = operand_class(b)
+        self.opcode_hits[opcode] += 1
+        self.a_hits[a_class] += 1
+        self.b_hits[b_class] += 1
+        self.cross_hits[opcode, a_class, b_class] += 1
+
+    def sample_batch(self, opcodes, a, b):
+        """Count arrays of transactions (e.g. the arrays of an AluTxnBatch)"""
+        opcodes = np.asarray(opcodes).astype(np.int64)
+        valid = (opcodes >= 0) & (opcodes < self.num_opcodes)
+        opcodes = opcodes[valid]
+        a_classes = operand_classes(a)[valid]
+        b_classes = operand_classes(b)[valid]
+        n = len(OPERAND_BINS)
+        self.opcode_hits += np.bincount(opcodes, minlength=self.num_opcodes)
+        self.a_hits += np.bincount(a_classes, minlength=n)
+        self.b_hits += np.bincount(b_classes, minlength=n)
+        cross = (opcodes * n + a_classes) * n + b_classes
+        self.cross_hits += np.bincount(cross, minlength=self.cross_hits.size).reshape(self.cross_hits.shape)
+
+    def opcode_coverage(self) -> float:
+        """Percentage of hit opcode bins"""
+        return 100.0 * np.count_nonzero(self.opcode_hits[self.opcodes]) / len(self.opcodes)
+
+    def operand_coverage(self, hits: np.ndarray) -> float:
+        return 100.0 * np.count_nonzero(hits) / hits.size
+
+    def cross_coverage(self) -> float:
+        """Percentage of hit (not ignored) cross bins"""
+        valid = ~self.cross_ignored[self.opcodes]
+        return 100.0 * np.count_nonzero(self.cross_hits[self.opcodes][valid]) / np.count_nonzero(valid)
+
+    def coverage(self) -> float:
+        """Covergroup coverage: average of the coverpoint and cross coverages (as reported by pyvsc)"""
+        return (self.opcode_coverage() + self.operand_coverage(self.a_hits) +
+                self.operand_coverage(self.b_hits) + self.cross_coverage()) / 4
+
+    def cross_bins(self):
+        """(opcode, a bin, b bin) of all cross bins that are not ignored, in report order"""
+        return [(op, a, b) for op in self.opcodes for a in range(len(OPERAND_BINS)) for b in range(len(OPERAND_BINS))
+                if not self.cross_ignored[op, a, b]]
+
+    def to_ucis(self):
+        """Build an in-memory UCIS database with the same structure as vsc.write_coverage_db"""
+        import ucis
+        from ucis import (UCIS_OTHER, UCIS_DU_MODULE, UCIS_ENABLED_STMT, UCIS_ENABLED_BRANCH, UCIS_ENABLED_COND,
+                          UCIS_ENABLED_EXPR, UCIS_ENABLED_FSM, UCIS_ENABLED_TOGGLE, UCIS_INST_ONCE,
+                          UCIS_SCOPE_UNDER_DU, UCIS_INSTANCE, UCIS_HISTORYNODE_TEST,
+                          UCIS_TESTSTATUS_OK)
+        from ucis.mem.mem_factory import MemFactory
+        from ucis.test_data import TestData
+
+        db = MemFactory.create()
+        test = db.createHistoryNode(None, "logicalName", "foo.ucis", UCIS_HISTORYNODE_TEST)
+        test.setTestData(TestData(teststatus=UCIS_TESTSTATUS_OK, toolcategory="UCIS:simulator",
+                                  date=ucis.ucis_Time()))
+        du = db.createScope("du", None, 1, UCIS_OTHER, UCIS_DU_MODULE,
+                            UCIS_ENABLED_STMT | UCIS_ENABLED_BRANCH | UCIS_ENABLED_COND | UCIS_ENABLED_EXPR |
+                            UCIS_ENABLED_FSM | UCIS_ENABLED_TOGGLE | UCIS_INST_ONCE | UCIS_SCOPE_UNDER_DU)
+        inst = db.createInstance("cg_inst", None, 1, UCIS_OTHER, UCIS_INSTANCE, du, UCIS_INST_ONCE)
+        cg = inst.createCovergroup(self.name, None, 1, UCIS_OTHER)
+        # Like pyvsc: the bins are saved for the covergroup type and for its (only) instance
+        self._add_bins(cg)
+        self._add_bins(cg.createCoverInstance(self.name, None, 1, UCIS_OTHER))
+        return db
+
+    def _add_bins(self, scope):
+        """Add the coverpoints and the cross with their bins to a UCIS covergroup scope"""
+        from ucis import UCIS_OTHER, UCIS_CVGBIN
+
+        def add_coverpoint(name, bins):
+            coverpoint = scope.createCoverpoint(name, None, 1, UCIS_OTHER)
+            for bin_name, hits in bins:
+                coverpoint.createBin(bin_name, None, 1, int(hits), bin_name, UCIS_CVGBIN)
+            return coverpoint
+
+        opcode_cp = add_coverpoint(self.opcode_name, [(op.name, self.opcode_hits[op]) for op in self.opcodes])
+        a_cp = add_coverpoint(self.a_name, zip(OPERAND_BINS, self.a_hits))
+        b_cp = add_coverpoint(self.b_name, zip(OPERAND_BINS, self.b_hits))
+        cross = scope.createCross(self.cross_name, None, 1, UCIS_OTHER, [opcode_cp, a_cp, b_cp])
+        for op, a, b in self.cross_bins():
+            bin_name = f"<{op.name},{OPERAND_BINS[a]},{OPERAND_BINS[b]}>"
+            cross.createBin(bin_name, None, 1, int(self.cross_hits[op, a, b]), bin_name)
+
+    def write_reports(self, prefix: str):
+        """Write the {prefix}_func_cov.log text report and the {prefix}_func_cov.xml UCIS database"""
+        from ucis.report.coverage_report_builder import CoverageReportBuilder
+        from ucis.report.text_coverage_report_formatter import TextCoverageReportFormatter
+        from ucis.xml.xml_factory import XmlFactory
+
+        db = self.to_ucis()
+        with open(f"{prefix}_func_cov.log", "w") as fp:
+            formatter = TextCoverageReportFormatter(CoverageReportBuilder.build(db), fp)
+            formatter.details = True
+            formatter.report()
+        XmlFactory.write(db, f"{prefix}_func_cov.xml")
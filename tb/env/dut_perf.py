@@ -0,0 +1,158 @@
+"""
+Opt-in (DUT_STATS=1) performance statistics of the DUT: accepted transactions per cycle,
+input-to-output latency in cycles per opcode (histogram and percentiles) and cycles stalled
+on ready_o (input) or valid_o (output). The env writes the statistics of all lanes to
+<prefix>_dut_stats.json, which the dashboard summarizes. DUT_MAX_LATENCY fails the test when
+an item takes longer, like a scoreboard mismatch.
+Output backpressure (BACKPRESSURE=random|bursty) makes the driver drop ready_i on some cycles.
+"""
+from collections import Counter, deque
+import json
+import os
+from random import Random
+from pyuvm import uvm_component
+from env.utils import AluOp
+
+
+def dut_stats_enabled() -> bool:
+    """True if the agents measure the DUT's performance (DUT_STATS=1)"""
+    return os.getenv("DUT_STATS") == "1"
+
+
+class Backpressure:
+    """
+    ready_i pattern of the testbench, one value per clock cycle. ready_i is low on a `rate`
+    fraction of the cycles:
+    - random: every cycle independently
+    - bursty: in bursts of `burst` cycles on average (two-state Markov chain)
+    """
+    modes = ("random", "bursty")
+
+    def __init__(self, mode: str, rate: float = 0.3, burst: float = 8, rng: Random = None):
+        if mode not in self.modes:
+            raise ValueError(f"Unknown backpressure mode {mode!r} (expected one of {', '.join(self.modes)})")
+        if not 0 <= rate < 1 or burst < 1:
+            raise ValueError(f"Invalid backpressure: rate {rate} must be in [0, 1), burst {burst} at least 1")
+        self.mode = mode
+        self.rate = rate
+        self.burst = burst
+        self.rng = rng or Random()
+        # Bursty: leave a stall with probability 1/burst, enter one so that stalls are a `rate` fraction of cycles
+        self.p_end = 1 / burst
+        self.p_start = min(1.0, rate * self.p_end / (1 - rate))
+        self.stalled = False
+
+    @classmethod
+    def from_env(cls, rng: Random):
+        """Backpressure configured by BACKPRESSURE, BACKPRESSURE_RATE and BACKPRESSURE_BURST, or None"""
+        mode = os.getenv("BACKPRESSURE", "none")
+        if mode == "none":
+            return None
+        return cls(mode, float(os.getenv("BACKPRESSURE_RATE", "0.3")),
+                   float(os.getenv("BACKPRESSURE_BURST", "8")), rng)
+
+    def ready(self) -> int:
+        """ready_i of the next cycle"""
+        if self.mode == "random":
+            return int(self.rng.random() >= self.rate)
+        self.stalled = self.rng.random() >= self.p_end if self.stalled else self.rng.random() < self.p_start
+        return int(not self.stalled)
+
+    def to_dict(self):
+        return {"mode": self.mode, "rate": self.rate, "burst": self.burst}
+
+
+def latency_summary(histogram: Counter):
+    """Count, mean, percentiles and maximum of a {latency: count} histogram"""
+    count = sum(histogram.values())
+    summary = {"count": count, "mean": 0.0, "p50": 0, "p90": 0, "p99": 0, "max": 0,
+               "histogram": {str(latency): histogram[latency] for latency in sorted(histogram)}}
+    if count == 0:
+        return summary
+    summary["mean"] = round(sum(latency * n for latency, n in histogram.items()) / count, 3)
+    summary["max"] = max(histogram)
+    cumulative = 0
+    pending = [("p50", 0.50), ("p90", 0.90), ("p99", 0.99)]
+    for latency in sorted(histogram):
+        cumulative += histogram[latency]
+        while pending and cumulative >= pending[0][1] * count:
+            summary[pending.pop(0)[0]] = latency
+    return summary
+
+
+class AluPerfMonitor(uvm_component):
+    """
+    Measures the DUT of one lane from the handshakes reported by the agent's interface sampler
+    (the same ones the monitor rebuilds items from) and the handshake signals of every cycle.
+    The latency of an item is the number of cycles from its input to its output handshake.
+    """
+    lane = 0  # ALU lane, set by the agent
+
+    def build_phase(self):
+        self.cycles = 0
+        self.accepted = 0
+        self.completed = 0
+        self.input_stall_cycles = 0  # valid_i high, ready_o low
+        self.output_stall_cycles = 0  # valid_o high, ready_i low
+        self.pending = deque()  # (opcode, cycle) of the accepted inputs
+        self.latencies = {op: Counter() for op in AluOp}
+        self.max_latency = int(os.getenv("DUT_MAX_LATENCY", "0"))
+
+    def observe_cycle(self, valid_i, ready_o, valid_o, ready_i):
+        """Called by the interface sampler at every rising clock edge, before the handshakes"""
+        self.cycles += 1
+        if valid_i and not ready_o:
+            self.input_stall_cycles += 1
+        if valid_o and not ready_i:
+            self.output_stall_cycles += 1
+
+    def observe_input(self, opcode, a, b):
+        self.accepted += 1
+        self.pending.append((opcode, self.cycles))
+
+    def observe_output(self, result):
+        opcode, cycle = self.pending.popleft()
+        self.completed += 1
+        self.latencies[AluOp(opcode)][self.cycles - cycle] += 1
+
+    def worst_latency(self) -> int:
+        return max((max(histogram) for histogram in self.latencies.values() if histogram), default=0)
+
+    def stats(self):
+        cycles = self.cycles or 1
+        return {"lane": self.lane, "cycles": self.cycles, "accepted": self.accepted, "completed": self.completed,
+                "outstanding": len(self.pending), "throughput": round(self.accepted / cycles, 4),
+                "input_stall_cycles": self.input_stall_cycles, "output_stall_cycles": self.output_stall_cycles,
+                "latency": {op.name: latency_summary(histogram)
+                            for op, histogram in self.latencies.items() if histogram}}
+
+    def check_phase(self):
+        super().check_phase()
+        if self.max_latency:
+            worst = self.worst_latency()
+            assert worst <= self.max_latency, \
+                f"Lane {self.lane}: DUT latency of {worst} cycles exceeds DUT_MAX_LATENCY={self.max_latency}"
+
+
+def write_dut_stats(path, monitors, **info):
+    """
+    Write the statistics of the lanes (AluPerfMonitors) to a JSON file: the totals of all lanes
+    (accepted transactions per cycle summed over the lanes, latency histograms merged) and each lane.
+    """
+    lanes = [monitor.stats() for monitor in monitors]
+    latencies = {op: Counter() for op in AluOp}
+    for monitor in monitors:
+        for op, histogram in monitor.latencies.items():
+            latencies[op].update(histogram)
+    cycles = max((lane["cycles"] for lane in lanes), default=0)
+    accepted = sum(lane["accepted"] for lane in lanes)
+    stats = {**info, "lanes": len(lanes), "cycles": cycles, "transactions": accepted,
+             "throughput": round(accepted / cycles, 4) if cycles else 0.0,
+             "input_stall_cycles": sum(lane["input_stall_cycles"] for lane in lanes),
+             "output_stall_cycles": sum(lane["output_stall_cycles"] for lane in lanes),
+             "latency": {op.name: latency_summary(histogram) for op, histogram in latencies.items() if histogram},
+             "all_latency": latency_summary(sum(latencies.values(), Counter())),
+             "per_lane": lanes}
+    with open(path, "w") as fp:
+        json.dump(stats, fp, indent=2)
+    return stats
@@ -1,144 +1,498 @@
-from enum import Enum
+from collections import deque
+import json
+import logging
 import os
 from random import Random
-from pyuvm import uvm_sequencer, uvm_driver, uvm_monitor, uvm_subscriber, uvm_analysis_port, uvm_sequence_item, uvm_agent, uvm_env, ConfigDB
+from pyuvm import uvm_component, uvm_sequencer, uvm_driver, uvm_monitor, uvm_subscriber, uvm_analysis_port, uvm_sequence_item, uvm_agent, uvm_env, ConfigDB
 import cocotb
-from cocotb.triggers import FallingEdge, Event
+from cocotb.queue import Queue
+from cocotb.triggers import Event, FallingEdge, First, RisingEdge
 from cocotb.clock import Clock
-import vsc
-from env.utils import AluOp, wait_for_ready_valid
+from cocotb.utils import get_sim_time
+import numpy as np
+from env.utils import AluOp, alu_ref_model, UVMComponentMixin
+from env.constraints import AluConstraints
+from env.coverage import AluCoverage
+from env.dut_perf import AluPerfMonitor, Backpressure, dut_stats_enabled, write_dut_stats
+from env.recorder import TxnRecorder, TxnSource, TxnStatus
+from env.tlm import AluTlmBackend, tlm_enabled
+
+def num_lanes() -> int:
+    """Number of ALU lanes of the toplevel (LANES > 1: alu_lanes in rtl/alu_lanes.sv)"""
+    return int(os.getenv("LANES", "1"))
+
+
+def lane_handles(lane: int):
+    """Signal handles of one ALU lane: (clock, handle with the lane's interface signals)"""
+    dut = cocotb.top
+    return dut.clk_i, (dut if num_lanes() == 1 else dut.lane[lane])
+
 
 class AluEnv(uvm_env):
+    """
+    One agent and one scoreboard per ALU lane (LANES), all on the same clock. The transaction
+    recorder and the functional coverage model are shared by all lanes.
+    """
     def build_phase(self):
-        self.agent = AluAgent("agent", self)
-        self.scoreboard = AluScoreboard("scoreboard", self)
+        # Transaction recorder shared by the driver, monitor and scoreboard (TXN_RECORD=0: ring buffer only)
+        path = f"{os.getenv('OUT_NAME_PREFIX', '')}_txns.bin" if os.getenv("TXN_RECORD", "1") == "1" else None
+        self.recorder = TxnRecorder(path, int(os.getenv("TXN_RING_SIZE", "32")))
+        ConfigDB().set(None, "*", "txn_recorder", self.recorder)
+        # Coverage model sampled by the monitors of all lanes
+        self.coverage = None
+        if os.getenv("COVERAGE_EN") == "1":
+            if os.getenv("COVERAGE_ENGINE", "vsc") == "native":
+                self.coverage = AluCoverage()
+            else:
+                # pyvsc (and pyucis) are only imported when their covergroup is used
+                from env.vsc_coverage import new_covergroup
+                self.coverage = new_covergroup()
+            ConfigDB().set(None, "*", "alu_coverage", self.coverage)
+        self.agents = [AluAgent(f"agent{lane}", self, lane) for lane in range(num_lanes())]
+        self.scoreboards = [AluScoreboard(f"scoreboard{lane}", self) for lane in range(num_lanes())]
+        for lane, scoreboard in enumerate(self.scoreboards):
+            scoreboard.lane = lane
+        # Lane 0 (the only lane of the single ALU toplevel)
+        self.agent, self.scoreboard = self.agents[0], self.scoreboards[0]
     def connect_phase(self):
-        self.agent.monitor.ap.connect(self.scoreboard.analysis_export)
+        for agent, scoreboard in zip(self.agents, self.scoreboards):
+            agent.monitor.ap.connect(scoreboard.analysis_export)
     async def run_phase(self):
+        # The TLM backend is not clocked
+        if tlm_enabled():
+            return
         self.logger.info("Starting clock")
         cocotb.start_soon(Clock(cocotb.top.clk_i, 1, units="ns").start())
+    def report_phase(self):
+        super().report_phase()
+        prefix = os.getenv("OUT_NAME_PREFIX", "")
+        if dut_stats_enabled():
+            backpressure = self.agent.driver.backpressure
+            write_dut_stats(f"{prefix}_dut_stats.json", [agent.perf for agent in self.agents],
+                            test=type(self.get_parent()).__name__, prefix=prefix,
+                            backpressure=backpressure.to_dict() if backpressure else None)
+        if self.coverage is None:
+            return
+        self.coverage.write_reports(prefix)
+    def final_phase(self):
+        self.recorder.close()
 
 
-class AluAgent(uvm_agent):
+class AluAgent(uvm_agent, UVMComponentMixin):
+    """
+    Agent of one ALU lane. Its RNG (UVMComponentMixin) seeds the sequences started on the lane,
+    so every lane gets independent stimulus. With DUT_STATS=1, a perf monitor measures the
+    DUT from the same handshakes as the monitor.
+    """
+    def __init__(self, name, parent, lane: int = 0):
+        uvm_agent.__init__(self, name, parent)
+        UVMComponentMixin.__init__(self)
+        self.lane = lane
     def build_phase(self):
-        self.seqr = uvm_sequencer("seqr", self)
+        self.seqr = AluSequencer("seqr", self)
+        # TLM=1: in-process ALU model with the sampler's interface instead of the DUT
+        self.sampler = AluTlmBackend("sampler", self) if tlm_enabled() else AluIfSampler("sampler", self)
         self.driver = AluDriver("driver", self)
         self.monitor = AluMonitor("monitor", self)
+        self.perf = AluPerfMonitor("perf", self) if dut_stats_enabled() else None
+        for component in (self.sampler, self.driver, self.monitor, self.perf):
+            if component is not None:
+                component.lane = self.lane
+        # Own RNG stream: enabling backpressure does not change the stimulus of the lane
+        self.driver.backpressure = Backpressure.from_env(Random(f"backpressure:{self._seed}"))
     def connect_phase(self):
         self.driver.seq_item_port.connect(self.seqr.seq_item_export)
+        self.driver.seqr = self.seqr
+        self.driver.sampler = self.sampler
+        self.sampler.add_input_listener(self.monitor.observe_input)
+        self.sampler.add_output_listener(self.monitor.observe_output)
+        if self.perf is not None:
+            self.sampler.add_cycle_listener(self.perf.observe_cycle)
+            self.sampler.add_input_listener(self.perf.observe_input)
+            self.sampler.add_output_listener(self.perf.observe_output)
 
-class AluDriver(uvm_driver):
+
+class AluSequencer(uvm_sequencer):
+    """
+    uvm_sequencer with a bulk path next to the per-item handshake: sequences push whole
+    batches of items (BaseSeq.send_items) into a bounded queue of SEQ_BATCH_DEPTH batches,
+    which the driver drains without start_item/finish_item/item_done round trips. A full
+    queue blocks the sequence (backpressure). Per-item sequences are unaffected.
+    """
+    batch_depth = 2  # Queue depth: number of batches waiting for the driver
+
+    def __init__(self, name, parent):
+        super().__init__(name, parent)
+        self.batch_depth = int(os.getenv("SEQ_BATCH_DEPTH", self.batch_depth))
+        self.batch_q = Queue(maxsize=self.batch_depth)
+        self.pending_batches = 0  # Queued batches the driver did not finish yet
+        self.drained = Event()
+
+    async def put_batch(self, items):
+        """Queue a batch of items for the driver, wait while the queue is full"""
+        self.pending_batches += 1
+        self.drained.clear()
+        await self.batch_q.put(items)
+
+    def batch_done(self):
+        """Called by the driver once the last item of a batch was driven"""
+        self.pending_batches -= 1
+        if self.pending_batches == 0:
+            self.drained.set()
+
+    async def wait_batches(self):
+        """Wait until all queued batches were driven"""
+        if self.pending_batches:
+            await self.drained.wait()
+
+
+class AluIfSampler(uvm_component):
+    """
+    Samples the ALU interface once per rising clock edge for the whole agent, instead of
+    every component polling the handshake signals. Signal handles are resolved once and
+    the payload (opcode/a/b or result) is only read when a handshake happens.
+    - Listeners get the sampled values of every input (opcode, a, b) and output (result) handshake.
+    - Cycle listeners get the handshake signals (valid_i, ready_o, valid_o, ready_i) of every
+      cycle; they are only read when there is a cycle listener.
+    - wait_input_handshake() returns at the next input handshake.
+    """
+    lane = 0  # ALU lane, set by the agent
+
+    def build_phase(self):
+        self.input_listeners = []
+        self.output_listeners = []
+        self.cycle_listeners = []
+        self.input_event = Event()
+
+    def add_input_listener(self, listener):
+        """listener(opcode, a, b) is called at every input handshake"""
+        self.input_listeners.append(listener)
+
+    def add_output_listener(self, listener):
+        """listener(result) is called at every output handshake"""
+        self.output_listeners.append(listener)
+
+    def add_cycle_listener(self, listener):
+        """listener(valid_i, ready_o, valid_o, ready_i) is called at every rising clock edge"""
+        self.cycle_listeners.append(listener)
+
+    async def wait_input_handshake(self):
+        await self.input_event.wait()
 
     async def run_phase(self):
-        dut = cocotb.top
-        dut.valid_i.value = 0 # Input is not valid by default
+        clk, dut = lane_handles(self.lane)
+        valid_i, ready_o, opcode_i, a_i, b_i = dut.valid_i, dut.ready_o, dut.opcode_i, dut.a_i, dut.b_i
+        valid_o, ready_i, result_o = dut.valid_o, dut.ready_i, dut.result_o
+        rising_edge = RisingEdge(clk)
         # Wait for the first reset to finish
         reset_event = ConfigDB().get(None, "", "reset_finished_event")
         await reset_event.wait()
-        dut.ready_i.value = 1 # TB is always ready to accept DUT's output
+        cycle_listeners = self.cycle_listeners
         while True:
-            item: AluTxn = await self.seq_item_port.get_next_item()
-            await FallingEdge(dut.clk_i)
-            dut.valid_i.value = 1
-            dut.opcode_i.value = item.opcode.value
-            dut.a_i.value = item.a
-            dut.b_i.value = item.b
-            await wait_for_ready_valid(dut, dut.ready_o, dut.valid_i)
-            self.seq_item_port.item_done()
-            self.logger.info(f"Applied item: {item}")
+            await rising_edge
+            if cycle_listeners:
+                signals = int(valid_i.value), int(ready_o.value), int(valid_o.value), int(ready_i.value)
+                for listener in cycle_listeners:
+                    listener(*signals)
+            # An output handshake always belongs to an earlier input handshake -> handle it first
+            if int(valid_o.value) and int(ready_i.value):
+                result = int(result_o.value)
+                for listener in self.output_listeners:
+                    listener(result)
+            if int(valid_i.value) and int(ready_o.value):
+                opcode, a, b = int(opcode_i.value), int(a_i.value), int(b_i.value)
+                for listener in self.input_listeners:
+                    listener(opcode, a, b)
+                # Every waiter is woken once: later waiters get a new event
+                event, self.input_event = self.input_event, Event()
+                event.set()
 
+class AluDriver(uvm_driver):
+    """
+    Drives items on the ALU input interface. In streaming mode (STREAMING=1), valid_i
+    stays asserted across consecutive items: the next item is presented in the cycle in
+    which the previous handshake completes, and valid_i only drops when the sequencer
+    has no item ready. In TLM mode (TLM=1), items are handed to the TLM backend instead.
+    Items come either from the sequencer's batch queue (bulk sequences, no per-item
+    handshake) or from the usual get_next_item/item_done handshake, whichever is ready first.
+    With a Backpressure pattern (BACKPRESSURE), ready_i follows the pattern instead of staying high.
+    """
+    lane = 0  # ALU lane, set by the agent
+    seqr = None  # AluSequencer, set by the agent
+    backpressure = None  # Backpressure, set by the agent
 
-class AluMonitor(uvm_monitor):
     def build_phase(self):
-        self.ap = uvm_analysis_port("ap", self)
-        self.dut = cocotb.top
-        if os.getenv("COVERAGE_EN") == "1":
-            self.cov_group = AluCovGroup()
-            self.collect_coverage = True
-        else:
-            self.collect_coverage = False
+        self.streaming = os.getenv("STREAMING") == "1"
+        self.tlm = tlm_enabled()
+        self.recorder = ConfigDB().get(None, "", "txn_recorder")
+        self.batch = deque()  # Remaining items of the current bulk batch
+        self.handshake = False  # The current item came through get_next_item
+        self.item_task = None
+        self.batch_task = None
+
+    async def next_item(self):
+        """
+        Next item to drive: the next item of the current bulk batch, else the first item
+        delivered by either source. The fetch of the other source stays pending for later.
+        """
+        if self.batch:
+            return self.batch.popleft()
+        if self.item_task is None:
+            self.item_task = cocotb.start_soon(self.seq_item_port.get_next_item())
+        if self.batch_task is None and self.seqr is not None:
+            self.batch_task = cocotb.start_soon(self.seqr.batch_q.get())
+        await First(*[task for task in (self.batch_task, self.item_task) if task is not None])
+        if self.batch_task is not None and self.batch_task.done():
+            self.batch.extend(self.batch_task.result())
+            self.batch_task = None
+            self.handshake = False
+            return self.batch.popleft()
+        item, self.item_task = self.item_task.result(), None
+        self.handshake = True
+        return item
+
+    def item_done(self):
+        """The current item was driven: complete its handshake or, at the end of a batch, the batch"""
+        if self.handshake:
+            self.handshake = False
+            self.seq_item_port.item_done()
+        elif not self.batch:
+            self.seqr.batch_done()
 
     async def run_phase(self):
-        dut = cocotb.top
+        if self.tlm:
+            # The TLM backend clocks the model: it applies the ready_i pattern itself
+            self.sampler.backpressure = self.backpressure
+            await self.run_tlm()
+            return
+        self.clk, dut = lane_handles(self.lane)
+        dut.valid_i.value = 0 # Input is not valid by default
         # Wait for the first reset to finish
         reset_event = ConfigDB().get(None, "", "reset_finished_event")
         await reset_event.wait()
+        dut.ready_i.value = 1 # TB is always ready to accept DUT's output
+        if self.backpressure is not None:
+            cocotb.start_soon(self.run_backpressure(dut))
+        if self.streaming:
+            await self.run_streaming(dut)
+        else:
+            await self.run_items(dut)
+
+    async def run_items(self, dut):
         while True:
-            # Wait for input to be accepted by the DUT
-            await wait_for_ready_valid(dut, dut.ready_o, dut.valid_i)
-            item = AluTxn("item")
-            item.opcode = AluOp(int(dut.opcode_i))
-            item.a = int(dut.a_i)
-            item.b = int(dut.b_i)
-            
-            # Wait for the DUT result to be ready
-            await wait_for_ready_valid(dut, dut.ready_i, dut.valid_o)
-            item.result = int(dut.result_o)
-            self.logger.info(f"Observed item: {item}")
-            self.ap.write(item)
-            if self.collect_coverage:
-                self.cov_group.alu_txn = item
-                self.cov_group.sample()
+            item: AluTxn = await self.next_item()
+            await FallingEdge(self.clk)
+            self.drive_item(dut, item)
+            await self.sampler.wait_input_handshake()
+            # Once ready again, the DUT would accept the item a second time
+            dut.valid_i.value = 0
+            self.item_done()
+            self.record_item(item)
 
-    def report_phase(self):
-        super().report_phase()
+    async def run_tlm(self):
+        while True:
+            item: AluTxn = await self.next_item()
+            self.sampler.transport(item.opcode, item.a, item.b)
+            self.item_done()
+            self.record_item(item)
+
+    async def run_backpressure(self, dut):
+        """Apply the ready_i pattern, one value per cycle"""
+        falling_edge = FallingEdge(self.clk)
+        while True:
+            await falling_edge
+            dut.ready_i.value = self.backpressure.ready()
+
+    def record_item(self, item):
+        """Record a driven item. Pooled records (bulk sequences) are not used afterwards: release them."""
+        self.recorder.record(TxnSource.DRIVER, item.opcode, item.a, item.b, lane=self.lane)
+        # Only formatted if DEBUG is enabled
+        self.logger.debug("Applied item: %s", item)
+        if isinstance(item, AluTxnRecord):
+            item.release()
+
+    def drive_item(self, dut, item):
+        dut.valid_i.value = 1
+        dut.opcode_i.value = item.opcode.value
+        dut.a_i.value = item.a
+        dut.b_i.value = item.b
+
+    async def run_streaming(self, dut):
+        next_item = cocotb.start_soon(self.next_item())
+        while True:
+            item: AluTxn = await next_item
+            await FallingEdge(self.clk)
+            while item is not None:
+                self.drive_item(dut, item)
+                await self.sampler.wait_input_handshake()
+                self.item_done()
+                self.record_item(item)
+                # The items of a bulk batch are ready at once
+                if self.batch:
+                    item = self.batch.popleft()
+                    continue
+                # A sequence that is ready hands over its next item without advancing time. If that
+                # happens before the falling edge, keep valid_i high and present the item right away.
+                next_item = cocotb.start_soon(self.next_item())
+                await First(next_item, FallingEdge(self.clk))
+                item = next_item.result() if next_item.done() else None
+            # Sequencer ran dry
+            dut.valid_i.value = 0
+
+
+class AluMonitor(uvm_monitor):
+    """
+    Rebuilds items from the handshakes reported by the agent's interface sampler:
+    inputs wait in a FIFO until their result comes out of the DUT. Items are pooled
+    AluTxnRecords, recycled by the scoreboard once checked.
+    Coverage is sampled into the env's coverage model, shared by all lanes. With
+    COVERAGE_ENGINE=native, coverage is counted by the array-backed AluCoverage in
+    batches of cov_batch_size items instead of sampling the pyvsc covergroup.
+    """
+    cov_batch_size = 256  # Items buffered before they are sampled by the native coverage engine
+    lane = 0  # ALU lane, set by the agent
+
+    def build_phase(self):
+        self.ap = uvm_analysis_port("ap", self)
+        self.pending = deque()
+        self.recorder = ConfigDB().get(None, "", "txn_recorder")
+        self.collect_coverage = os.getenv("COVERAGE_EN") == "1"
+        self.native_coverage = os.getenv("COVERAGE_ENGINE", "vsc") == "native"
         if self.collect_coverage:
-            prefix = os.getenv("OUT_NAME_PREFIX", "")
-            # Coverage report
-            with open(f"{prefix}_func_cov.log", "w") as fp:
-                vsc.report_coverage(fp=fp, details=True)
-            # Coverage DB
-            with open(f"{prefix}_func_cov.xml", "w") as fp:
-                vsc.write_coverage_db(filename=fp)
+            if self.native_coverage:
+                self.coverage = ConfigDB().get(None, "", "alu_coverage")
+                self.cov_batch = AluTxnBatch(self.cov_batch_size)
+            else:
+                self.cov_group = ConfigDB().get(None, "", "alu_coverage")
+
+    def observe_input(self, opcode, a, b):
+        """Called by the interface sampler when the DUT accepts an input"""
+        self.pending.append(AluTxnRecord.acquire(AluOp(opcode), a, b))
+
+    def observe_output(self, result):
+        """Called by the interface sampler when the DUT's result is consumed"""
+        item = self.pending.popleft()
+        item.result = result
+        self.recorder.record(TxnSource.MONITOR, item.opcode, item.a, item.b, result, lane=self.lane)
+        self.logger.debug("Observed item: %s", item)
+        # Coverage is sampled first: the scoreboard releases the record once it has consumed it
+        if self.collect_coverage:
+            self.sample_coverage(item)
+        self.ap.write(item)
+
+    def sample_coverage(self, item):
+        if self.native_coverage:
+            self.cov_batch.append(item)
+            if self.cov_batch.full():
+                self.sample_cov_batch()
+        else:
+            self.cov_group.alu_txn = item
+            self.cov_group.sample()
+
+    def sample_cov_batch(self):
+        """Count the buffered items in the native coverage engine"""
+        opcodes, a, b, _ = self.cov_batch.arrays()
+        self.coverage.sample_batch(opcodes, a, b)
+        self.cov_batch.clear()
+
+    def extract_phase(self):
+        super().extract_phase()
+        # Count the last items before the env writes the coverage reports
+        if self.collect_coverage and self.native_coverage:
+            self.sample_cov_batch()
+
+    def check_phase(self):
+        super().check_phase()
+        # Items the DUT accepted but whose result never came out were not checked by the scoreboard
+        assert not self.pending, \
+            f"Lane {self.lane}: {len(self.pending)} items accepted by the DUT were never observed at its output"
 
 class AluScoreboard(uvm_subscriber):
+    """
+    Buffers observed items in a bounded queue and checks them in batches against
+    the vectorized reference model. A batch is checked when the queue is full and
+    at the end of the test. With FAIL_FAST=1 (default) the test fails at the first
+    mismatch, otherwise mismatches are counted and the test fails in check_phase.
+    The first mismatch is also described in <prefix>_failure.json (lane, index of the
+    transaction on the lane, sim time of the check), so the regression can re-run it with waves.
+    """
+    batch_size = 64  # Queue depth: number of buffered items checked at once
+    lane = 0  # ALU lane, set by the env
+
     def __init__(self, name, parent=None):
         super().__init__(name, parent)
-        self.compare_event = Event()
-        self.item = None
+        self.checked = 0
+        self.mismatches = 0
+        self.batch_size = int(os.getenv("SB_BATCH_SIZE", self.batch_size))
+        self.fail_fast = os.getenv("FAIL_FAST", "1") == "1"
+        self.queue = AluTxnBatch(self.batch_size)
+        self.failure = None  # First mismatch
+
+    def build_phase(self):
+        self.recorder = ConfigDB().get(None, "", "txn_recorder")
 
     def write(self, item):
-        self.item = item
-        self.compare_event.set()
-        self.logger.info(f"Received item: {item}")
+        self.queue.append(item)
+        # The item's fields are copied into the queue -> pooled records can be reused
+        if isinstance(item, AluTxnRecord):
+            item.release()
+        if self.queue.full():
+            self.check_queue()
 
-    async def run_phase(self):
-        while True:
-            await self.compare_event.wait()
-            item: AluTxn = self.item
-            # Generate the expected result
-            expected_result = None
-            result_mask = (1 << 32) - 1  # Mask for 32-bit result
-            match item.opcode:
-                case AluOp.ADD:
-                    expected_result = item.a + item.b
-                case AluOp.SUB:
-                    expected_result = item.a - item.b
-                case AluOp.AND:
-                    expected_result = item.a & item.b
-                case AluOp.OR:
-                    expected_result = item.a | item.b
-                case AluOp.XOR:
-                    expected_result = item.a ^ item.b
-                case AluOp.SL:
-                    expected_result = item.a << item.b
-                case AluOp.SR:
-                    expected_result = item.a >> item.b   
-                case AluOp.MUL:
-                    expected_result = item.a * item.b
-                case AluOp.DIV:
-                    expected_result = item.a // item.b
-            expected_result &= result_mask
-            if item.result != expected_result:
-                self.logger.error(f"Opcode {item.opcode.name} failed. Expected {expected_result}, got {item.result}")
-                assert False 
-            else: 
-                self.logger.info(f"Opcode {item.opcode.name} passed. Input: {item.a}, {item.b}, Output: {item.result}")
-            self.compare_event.clear()
+    def check_queue(self):
+        """Check all queued items against the reference model"""
+        n = len(self.queue)
+        if n == 0:
+            return
+        opcodes, a, b, results = self.queue.arrays()
+        expected = alu_ref_model(opcodes, a, b)
+        failed = expected != results
+        if failed.any():
+            # Text is only rendered on failure: the last transactions driven and observed before the check
+            self.recorder.log_recent(self.logger)
+        self.recorder.record_batch(TxnSource.SCOREBOARD, opcodes, a, b, results,
+                                   np.where(failed, TxnStatus.FAIL, TxnStatus.PASS), self.lane)
+        for i in np.flatnonzero(failed):
+            item = self.queue.record(i)
+            self.mismatches += 1
+            self.logger.error(f"Opcode {item.opcode.name} failed. Input: {item.a}, {item.b}, "
+                              f"Expected {int(expected[i])}, got {item.result}")
+            self.write_failure(self.checked + int(i), item, int(expected[i]))
+            assert not self.fail_fast, f"Mismatch on item {self.checked + i}: {item}"
+        self.checked += n
+        if self.logger.isEnabledFor(logging.DEBUG):
+            for i in range(n):
+                item = self.queue.record(i)
+                self.logger.debug(f"Opcode {item.opcode.name} checked. Input: {item.a}, {item.b}, Output: {item.result}")
+        self.queue.clear()
+        self.logger.info(f"Checked {n} items ({self.checked} total, {self.mismatches} mismatches)")
+
+    def write_failure(self, index, item, expected):
+        """Describe the first mismatch in <prefix>_failure.json"""
+        if self.failure is not None:
+            return
+        self.failure = {"lane": self.lane, "index": index, "sim_time_ns": get_sim_time("ns"),
+                        "opcode": item.opcode.name, "a": item.a, "b": item.b, "result": item.result,
+                        "expected": expected}
+        with open(f"{os.getenv('OUT_NAME_PREFIX', '')}_failure.json", "w") as fp:
+            json.dump(self.failure, fp, indent=2)
+
+    def check_phase(self):
+        super().check_phase()
+        # Check the items that did not fill a whole batch
+        self.check_queue()
+        assert self.mismatches == 0, f"{self.mismatches} of {self.checked} items mismatched"
 
 
 class AluTxn(uvm_sequence_item):
+    """
+    ALU request. randomize()/rnd_operands() draw one item from the parent's RNG;
+    random_batch() draws a whole batch from `constraints` (see env.constraints). Bulk
+    sequences draw AluTxnRecord.random_batch() instead, which builds no sequence items.
+    """
     operand_bitwidth = 8  # Number of bits for inputs a and b, default is 8 bits
+    # Default constraints: all opcodes alike, operands uniform, no division by zero
+    constraints = AluConstraints().require(AluOp.DIV, lambda a, b: b != 0)
 
     def __init__(self, name, parent = None, a: int = 0, b: int = 0, opcode: AluOp = AluOp.ADD):
         super().__init__(name)
@@ -169,58 +523,116 @@ class AluTxn(uvm_sequence_item):
         if self.opcode is AluOp.DIV and self.b == 0:
             self.b = 1
 
+    @classmethod
+    def random_batch(cls, rng: np.random.Generator, n: int, constraints: AluConstraints = None,
+                     name="item", parent=None):
+        """n items drawn at once from `constraints` (default: AluTxn.constraints) with a NumPy generator"""
+        sampler = (constraints or cls.constraints).compile(cls.operand_bitwidth)
+        opcodes, a, b = sampler.sample(rng, n)
+        return [cls(name, parent, a=a_i, b=b_i, opcode=AluOp(op))
+                for op, a_i, b_i in zip(opcodes.tolist(), a.tolist(), b.tolist())]
+
     def __eq__(self, item) -> bool:
         return self.opcode is item.opcode and self.a == item.a and self.b == item.b and self.result == item.result
 
     def __repr__(self):
         return f"opcode: {self.opcode.name}, a: {self.a}, b: {self.b}, result: {self.result}"
 
-@vsc.covergroup
-class AluCovGroup():
+class AluTxnRecord:
+    """
+    Lightweight (slotted) transaction: no name, parent or per-instance dict. The monitor
+    observes records and the bulk sequences drive them. Records come from a free list
+    (acquire) and go back to it once consumed (release) by the scoreboard or the driver.
+    Use to_item() wherever a uvm_sequence_item is needed (e.g. pyuvm's per-item handshake).
+    """
+    __slots__ = ("opcode", "a", "b", "result")
+    _free = []  # Records released for reuse
 
-    class OperandsEnum(Enum):
-        POSITIVE = 0
-        NEGATIVE = 1
-        ZERO = 2
+    def __init__(self, opcode: AluOp = AluOp.ADD, a: int = 0, b: int = 0, result: int = None):
+        self.opcode = opcode
+        self.a = a
+        self.b = b
+        self.result = result
+
+    @classmethod
+    def acquire(cls, opcode: AluOp, a: int, b: int, result: int = None):
+        """Return a recycled record (or a new one if none is free) holding the given fields"""
+        if cls._free:
+            record = cls._free.pop()
+            record.opcode, record.a, record.b, record.result = opcode, a, b, result
+            return record
+        return cls(opcode, a, b, result)
+
+    def release(self):
+        """Give the record back for reuse. It must not be used afterwards."""
+        self._free.append(self)
+
+    @classmethod
+    def random_batch(cls, rng: np.random.Generator, n: int, constraints: AluConstraints = None):
+        """n records drawn at once from `constraints` (default: AluTxn.constraints), like AluTxn.random_batch"""
+        sampler = (constraints or AluTxn.constraints).compile(AluTxn.operand_bitwidth)
+        opcodes, a, b = sampler.sample(rng, n)
+        ops = {op.value: op for op in AluOp}
+        acquire = cls.acquire
+        return [acquire(ops[op], a_i, b_i) for op, a_i, b_i in zip(opcodes.tolist(), a.tolist(), b.tolist())]
+
+    def to_item(self, name="item", parent=None):
+        """Convert to an AluTxn sequence item"""
+        item = AluTxn(name, parent, a=self.a, b=self.b, opcode=self.opcode)
+        item.result = self.result
+        return item
+
+    @classmethod
+    def from_item(cls, item):
+        """Create a record from an AluTxn (or any object with opcode, a, b and result)"""
+        return cls.acquire(item.opcode, item.a, item.b, item.result)
+
+    def __eq__(self, item) -> bool:
+        return self.opcode == item.opcode and self.a == item.a and self.b == item.b and self.result == item.result
+
+    def __repr__(self):
+        return f"opcode: {self.opcode.name}, a: {self.a}, b: {self.b}, result: {self.result}"
 
-    def operand_enum(self, value: int) -> OperandsEnum:
-        if value > 0:
-            return self.OperandsEnum.POSITIVE.value
-        elif value < 0:
-            return self.OperandsEnum.NEGATIVE.value
-        else:
-            return self.OperandsEnum.ZERO.value
 
-    def __init__(self):
+class AluTxnBatch:
+    """
+    Struct-of-arrays container for up to `capacity` transactions: one preallocated
+    array per field (opcode, a, b, result), filled without creating an object per beat.
+    """
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.opcode = np.zeros(capacity, dtype=np.uint64)
+        self.a = np.zeros(capacity, dtype=np.uint64)
+        self.b = np.zeros(capacity, dtype=np.uint64)
+        self.result = np.zeros(capacity, dtype=np.uint64)
+        self.size = 0
 
-        self.alu_txn: AluTxn = None
+    def append_fields(self, opcode: int, a: int, b: int, result: int):
+        i = self.size
+        self.opcode[i] = opcode
+        self.a[i] = a
+        self.b[i] = b
+        self.result[i] = result
+        self.size = i + 1
 
-        # Opcode coverpoint
-        self.opcode_cp = vsc.coverpoint(
-            name="opcode",
-            target=lambda: self.alu_txn.opcode.value,
-            bins={op.name: vsc.bin(op.value) for op in AluOp})
+    def append(self, item):
+        """Append an AluTxnRecord/AluTxn"""
+        self.append_fields(item.opcode, item.a, item.b, item.result)
 
-        # Operand A coverpoint
-        self.a_cp = vsc.coverpoint(
-            name="operand_a",
-            target=lambda: self.operand_enum(self.alu_txn.a),
-            bins={"positive": vsc.bin(self.OperandsEnum.POSITIVE.value),
-                  "negative": vsc.bin(self.OperandsEnum.NEGATIVE.value),
-                  "zero": vsc.bin(self.OperandsEnum.ZERO.value)})
+    def arrays(self):
+        """Views (no copy) of the filled part of the opcode, a, b and result arrays"""
+        n = self.size
+        return self.opcode[:n], self.a[:n], self.b[:n], self.result[:n]
 
+    def record(self, i: int) -> AluTxnRecord:
+        """Transaction i as a (new) record, e.g. for reporting"""
+        return AluTxnRecord(AluOp(int(self.opcode[i])), int(self.a[i]), int(self.b[i]), int(self.result[i]))
 
-        # Operand B coverpoint
-        self.b_cp = vsc.coverpoint(
-            name="operand_b",
-            target=lambda: self.operand_enum(self.alu_txn.b),
-            bins={"positive": vsc.bin(self.OperandsEnum.POSITIVE.value),
-                  "negative": vsc.bin(self.OperandsEnum.NEGATIVE.value),
-                  "zero": vsc.bin(self.OperandsEnum.ZERO.value)})
+    def full(self) -> bool:
+        return self.size >= self.capacity
 
-        # Cross. TODO: ignore bins with opcode==DIV and b==0
-        self.opcode_operands_cross = vsc.cross(
-            name="opcode_operands_cross",
-            target_l=[self.opcode_cp, self.a_cp, self.b_cp])
+    def clear(self):
+        self.size = 0
 
-        # TODO: collect coverage for the result: zero, positive, negative, with-carry, overflow
+    def __len__(self):
+        return self.size
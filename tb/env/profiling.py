@@ -0,0 +1,149 @@
+"""
+Opt-in (PROFILE_EN=1) instrumentation of the testbench: wall time of each UVM phase
+per component, coroutine wakeups, time spent in randomization, coverage sampling and
+checking, and throughput. BaseTest writes the results to <prefix>_perf.json.
+Nothing is instrumented unless profiling is enabled.
+"""
+from functools import wraps
+import json
+import os
+import time
+from cocotb.utils import get_sim_time
+
+# Phases timed for every component
+PHASES = ("build_phase", "connect_phase", "end_of_elaboration_phase", "start_of_simulation_phase",
+          "run_phase", "extract_phase", "check_phase", "report_phase")
+
+
+def profiling_enabled() -> bool:
+    """True if the testbench is instrumented (PROFILE_EN=1)"""
+    return os.getenv("PROFILE_EN") == "1"
+
+
+class Stat:
+    """Accumulated wall time and number of calls (or coroutine wakeups)"""
+    __slots__ = ("time", "calls", "depth")
+
+    def __init__(self):
+        self.time = 0.0
+        self.calls = 0
+        self.depth = 0  # Nesting of timed calls: only the outermost one is timed
+
+    def to_dict(self):
+        return {"time": round(self.time, 6), "calls": self.calls}
+
+
+class _TimedCoroutine:
+    """
+    Runs a coroutine step by step on behalf of the scheduler: every resumption is timed
+    and counted as a wakeup, so the time excludes what the coroutine spent waiting.
+    """
+    def __init__(self, coro, stat: Stat):
+        self.coro = coro
+        self.stat = stat
+
+    def __await__(self):
+        send, value = self.coro.send, None
+        while True:
+            start = time.perf_counter()
+            try:
+                trigger = send(value)
+            except StopIteration as e:
+                return e.value
+            finally:
+                self.stat.time += time.perf_counter() - start
+                self.stat.calls += 1
+            try:
+                send, value = self.coro.send, (yield trigger)
+            except GeneratorExit:
+                self.coro.close()
+                raise
+            except BaseException as e:
+                send, value = self.coro.throw, e
+
+
+class Profiler:
+    """Collects the instrumentation results of one test"""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.phases = {}  # Component full name -> phase -> Stat
+        self.sections = {}  # Section name -> Stat
+        self._patched = []  # (owner, attribute, original) to restore
+
+    def instrument(self, comp):
+        """Time the phases of a component. Its children are instrumented once its build phase created them."""
+        stats = self.phases.setdefault(comp.get_full_name(), {})
+        for phase in PHASES:
+            stats[phase] = Stat()
+            setattr(comp, phase, self._timed_phase(comp, phase, stats[phase]))
+
+    def _timed_phase(self, comp, phase, stat):
+        method = getattr(comp, phase)
+        if phase == "run_phase":
+            async def timed_run_phase():
+                return await _TimedCoroutine(method(), stat)
+            return timed_run_phase
+
+        @wraps(method)
+        def timed_phase():
+            start = time.perf_counter()
+            method()
+            stat.time += time.perf_counter() - start
+            stat.calls += 1
+            if phase == "build_phase":
+                for child in comp.get_children():
+                    self.instrument(child)
+        return timed_phase
+
+    def time_method(self, owner, name, section):
+        """Add the time spent in owner.name (a class or an object) to a section"""
+        stat = self.sections.setdefault(section, Stat())
+        method = getattr(owner, name)
+
+        @wraps(method)
+        def timed(*args, **kwargs):
+            stat.depth += 1
+            start = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                stat.depth -= 1
+                if stat.depth == 0:
+                    stat.time += time.perf_counter() - start
+                    stat.calls += 1
+        self._patched.append((owner, name, owner.__dict__.get(name)))
+        setattr(owner, name, timed)
+
+    def restore(self):
+        """Undo time_method (class methods are shared with the next test of a batch)"""
+        for owner, name, original in reversed(self._patched):
+            if original is None:
+                delattr(owner, name)
+            else:
+                setattr(owner, name, original)
+        self._patched = []
+
+    def wakeups(self, comp) -> int:
+        """Number of times the run phase of a component was resumed"""
+        return self.phases[comp.get_full_name()]["run_phase"].calls
+
+    def report(self, path, transactions: int, clock_edges: int, **info):
+        """Write the results as JSON"""
+        wall_time = time.perf_counter() - self.start
+        sim_time_ns = get_sim_time("ns")
+        result = dict(info)
+        result.update({
+            "wall_time": round(wall_time, 6),
+            "sim_time_ns": sim_time_ns,
+            "sim_wall_ratio": round(sim_time_ns / wall_time, 3) if wall_time else 0.0,  # ns of sim time per second
+            "transactions": transactions,
+            "txns_per_second": round(transactions / wall_time, 3) if wall_time else 0.0,
+            "clock_edges": clock_edges,
+            "sections": {name: stat.to_dict() for name, stat in self.sections.items()},
+            "phases": {comp: {phase: stat.to_dict() for phase, stat in stats.items()}
+                       for comp, stats in self.phases.items()},
+        })
+        with open(path, "w") as fp:
+            json.dump(result, fp, indent=2)
+        return result
@@ -0,0 +1,207 @@
+"""
+Binary transaction recorder: every transaction seen by the driver, the monitor and the
+scoreboard is appended as a fixed-width record to a memory-mapped per-test file
+(<prefix>_txns.bin), and the last few records are kept in an in-memory ring buffer.
+No text is produced while simulating: records are only rendered on failure (ring buffer)
+or offline with the dump tool:
+    python3 -m env.recorder sim/simple_test_1_verilator_txns.bin [--failed] [--source monitor] [--lane N] [--last N]
+"""
+import argparse
+from enum import IntEnum
+import mmap
+import numpy as np
+from cocotb.utils import get_sim_time
+from env.utils import AluOp
+
+MAGIC = b"ALUTXNS1"
+HEADER_DTYPE = np.dtype([("magic", "S8"), ("record_size", "<u4"), ("count", "<u4")])
+RECORD_DTYPE = np.dtype([("time", "<u8"),  # Sim time in ps
+                         ("source", "u1"), ("status", "u1"), ("opcode", "u1"), ("lane", "u1"),
+                         ("a", "<u4"), ("b", "<u4"), ("result", "<u4")])
+
+
+class TxnSource(IntEnum):
+    """Component that recorded a transaction"""
+    DRIVER = 0
+    MONITOR = 1
+    SCOREBOARD = 2
+
+
+class TxnStatus(IntEnum):
+    """Check status of a transaction (only the scoreboard checks)"""
+    NONE = 0
+    PASS = 1
+    FAIL = 2
+
+
+def format_record(record) -> str:
+    """Human-readable line of one record"""
+    try:
+        opcode = AluOp(int(record["opcode"])).name
+    except ValueError:
+        opcode = str(int(record["opcode"]))
+    status = TxnStatus(int(record["status"]))
+    line = (f"{int(record['time']):>12d} ps  lane {int(record['lane'])}  {TxnSource(int(record['source'])).name:10s} "
+            f"opcode: {opcode}, "
+            f"a: {int(record['a'])}, b: {int(record['b'])}, result: {int(record['result'])}")
+    return line if status is TxnStatus.NONE else f"{line}  {status.name}"
+
+
+class TxnRecorder:
+    """
+    Appends transaction records to a memory-mapped file (path=None: ring buffer only).
+    The last ring_size records are also kept in memory (0: no ring buffer).
+    The file starts with a header (magic, record size, record count) and grows by doubling.
+    The record count in the header is kept up to date, so a killed simulation still leaves
+    a readable file.
+    """
+    initial_capacity = 4096  # Records
+
+    def __init__(self, path=None, ring_size: int = 32):
+        self.path = path
+        self.count = 0
+        if ring_size < 0:
+            raise ValueError(f"Invalid ring buffer size {ring_size} (0 disables the ring buffer)")
+        self.ring = np.zeros(ring_size, dtype=RECORD_DTYPE)
+        self.file = self.mm = self.header = self.records = None
+        if path is not None:
+            self.file = open(path, "w+b")
+            self._map(self.initial_capacity)
+            self.header["magic"] = MAGIC
+            self.header["record_size"] = RECORD_DTYPE.itemsize
+
+    def _map(self, capacity: int):
+        """(Re)map the file with room for capacity records"""
+        size = HEADER_DTYPE.itemsize + capacity * RECORD_DTYPE.itemsize
+        # Views on the old mapping must be dropped before it can be resized
+        self.header = self.records = None
+        if self.mm is None:
+            self.file.truncate(size)
+            self.mm = mmap.mmap(self.file.fileno(), size)
+        else:
+            self.mm.resize(size)
+        self.header = np.ndarray((), dtype=HEADER_DTYPE, buffer=self.mm)
+        self.records = np.ndarray(capacity, dtype=RECORD_DTYPE, buffer=self.mm, offset=HEADER_DTYPE.itemsize)
+
+    def record(self, source: TxnSource, opcode: int, a: int, b: int, result: int = None,
+               status: TxnStatus = TxnStatus.NONE, lane: int = 0):
+        """Record one transaction of an ALU lane at the current sim time"""
+        record = (get_sim_time("ps"), source, status, opcode, lane, a, b, result or 0)
+        if len(self.ring):
+            self.ring[self.count % len(self.ring)] = record
+        if self.records is not None:
+            if self.count == len(self.records):
+                self._map(2 * len(self.records))
+            self.records[self.count] = record
+            self.header["count"] = self.count + 1
+        self.count += 1
+
+    def record_batch(self, source: TxnSource, opcodes, a, b, results, statuses, lane: int = 0):
+        """Record arrays of transactions of an ALU lane at the current sim time (e.g. a batch checked by the scoreboard)"""
+        n = len(opcodes)
+        if n == 0:
+            return
+        batch = np.zeros(n, dtype=RECORD_DTYPE)
+        batch["time"] = get_sim_time("ps")
+        batch["source"] = source
+        batch["status"] = statuses
+        batch["opcode"] = opcodes
+        batch["lane"] = lane
+        batch["a"] = a
+        batch["b"] = b
+        batch["result"] = results
+        if len(self.ring):
+            # Only the last len(ring) records can survive in the ring buffer
+            tail = batch[-len(self.ring):]
+            self.ring[np.arange(self.count + n - len(tail), self.count + n) % len(self.ring)] = tail
+        if self.records is not None:
+            capacity = len(self.records)
+            while capacity < self.count + n:
+                capacity *= 2
+            if capacity != len(self.records):
+                self._map(capacity)
+            self.records[self.count:self.count + n] = batch
+            self.header["count"] = self.count + n
+        self.count += n
+
+    def recent(self):
+        """The records in the ring buffer, oldest first"""
+        n = min(self.count, len(self.ring))
+        if n == 0:
+            return self.ring[:0]
+        return self.ring[np.arange(self.count - n, self.count) % len(self.ring)]
+
+    def log_recent(self, logger):
+        """Render the ring buffer into a log (e.g. when a check fails)"""
+        if not len(self.ring):
+            return
+        records = self.recent()
+        logger.error(f"Last {len(records)} recorded transactions:")
+        for record in records:
+            logger.error(f"    {format_record(record)}")
+
+    def close(self):
+        """Shrink the file to the recorded transactions and unmap it"""
+        if self.mm is None:
+            return
+        self.header = self.records = None
+        self.mm.flush()
+        self.mm.close()
+        self.mm = None
+        self.file.truncate(HEADER_DTYPE.itemsize + self.count * RECORD_DTYPE.itemsize)
+        self.file.close()
+
+
+def read_records(path):
+    """Read all records of a recording"""
+    header = np.fromfile(path, dtype=HEADER_DTYPE, count=1)
+    if len(header) == 0 or header["magic"][0] != MAGIC:
+        raise ValueError(f"{path} is not a transaction recording")
+    if header["record_size"][0] != RECORD_DTYPE.itemsize:
+        raise ValueError(f"{path} was recorded with {header['record_size'][0]}-byte records, "
+                         f"expected {RECORD_DTYPE.itemsize}")
+    return np.fromfile(path, dtype=RECORD_DTYPE, count=int(header["count"][0]), offset=HEADER_DTYPE.itemsize)
+
+
+def driven_records(records):
+    """The transactions of a recording as driven into the DUT, in order (e.g. for a replay)"""
+    return records[records["source"] == TxnSource.DRIVER]
+
+
+def write_records(path, records):
+    """Write records as a recording (e.g. a subset of another recording)"""
+    header = np.zeros((), dtype=HEADER_DTYPE)
+    header["magic"] = MAGIC
+    header["record_size"] = RECORD_DTYPE.itemsize
+    header["count"] = len(records)
+    with open(path, "wb") as fp:
+        fp.write(header.tobytes())
+        fp.write(np.asarray(records, dtype=RECORD_DTYPE).tobytes())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Print a binary transaction recording")
+    parser.add_argument("file", help="Recording (<prefix>_txns.bin)")
+    parser.add_argument("--source", choices=[source.name.lower() for source in TxnSource],
+                        help="Only print the transactions of one component")
+    parser.add_argument("--lane", type=int, default=None, help="Only print the transactions of one ALU lane")
+    parser.add_argument("--failed", action="store_true", help="Only print the failed transactions")
+    parser.add_argument("--last", type=int, default=0, help="Only print the last N transactions")
+
+    args = parser.parse_args()
+
+    records = read_records(args.file)
+    if args.source:
+        records = records[records["source"] == TxnSource[args.source.upper()]]
+    if args.lane is not None:
+        records = records[records["lane"] == args.lane]
+    if args.failed:
+        records = records[records["status"] == TxnStatus.FAIL]
+    if args.last:
+        records = records[-args.last:]
+    for record in records:
+        print(format_record(record))
+
+# When the script is run directly, invoke the main function
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+Transaction-level (TLM=1) backend: the agent talks to an in-process Python model of
+rtl/dut.sv instead of cocotb.top. No clock is started and no RTL is evaluated: the
+whole test runs in zero simulation time on cocotb's scheduler (which pyuvm needs).
+"""
+import os
+from pyuvm import uvm_component
+from env.utils import AluOp, RESULT_MASK
+
+
+def tlm_enabled() -> bool:
+    """True if the env runs against the Python ALU model (TLM=1)"""
+    return os.getenv("TLM") == "1"
+
+
+def alu_result(opcode: int, a: int, b: int) -> int:
+    """Result of one operation (same semantics as alu_ref_model, for scalars)"""
+    if opcode == AluOp.ADD:
+        res = a + b
+    elif opcode == AluOp.SUB:
+        res = a - b
+    elif opcode == AluOp.AND:
+        res = a & b
+    elif opcode == AluOp.OR:
+        res = a | b
+    elif opcode == AluOp.XOR:
+        res = a ^ b
+    elif opcode == AluOp.SL:
+        res = a << b if b < 32 else 0
+    elif opcode == AluOp.SR:
+        res = a >> b if b < 32 else 0
+    elif opcode == AluOp.MUL:
+        res = a * b
+    elif opcode == AluOp.DIV:
+        res = a // b if b != 0 else 0
+    else:
+        res = 0
+    return res & RESULT_MASK
+
+
+class AluModel:
+    """
+    Cycle model of rtl/dut.sv: the registers (valid_o, ready_o, result_o) and one
+    clock() call per rising clock edge with the same ready/valid behavior: while the output
+    waits for ready_i, no input is accepted and the result is held.
+    """
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.valid_o = 0
+        self.ready_o = 0
+        self.result_o = 0
+        self.cycles = 0
+
+    def clock(self, valid_i: int, opcode_i: int, a_i: int, b_i: int, ready_i: int):
+        """Rising clock edge. Returns (input handshake, output handshake) of this edge."""
+        input_handshake = valid_i and self.ready_o
+        output_handshake = self.valid_o and ready_i
+        if input_handshake:  # We accepted an input
+            self.ready_o = 0  # Not ready until output is consumed
+            self.valid_o = 1  # Output is valid. Single cycle operation
+        elif output_handshake:  # Our output was consumed
+            self.ready_o = 1
+            self.valid_o = 0
+        else:  # No input or output
+            self.ready_o = int(not self.valid_o)  # Not ready while the output waits for ready_i
+        # The result register captures the result of an accepted input
+        if input_handshake:
+            self.result_o = alu_result(opcode_i, a_i, b_i)
+        self.cycles += 1
+        return input_handshake, output_handshake
+
+
+class AluTlmBackend(uvm_component):
+    """
+    Replaces AluIfSampler in TLM mode, with the same listener interface, so the monitor
+    is unchanged. The driver hands each item to transport(), which clocks the model
+    until the item is accepted, calling the listeners in the same order as the sampler
+    would (output handshake before input handshake). Like with the RTL, the result of an
+    item is consumed while the next item is presented, or by drain() at the end of the test.
+    With a Backpressure pattern (set by the driver), ready_i follows it instead of staying high.
+    """
+    def __init__(self, name, parent):
+        super().__init__(name, parent)
+        self.input_listeners = []
+        self.output_listeners = []
+        self.cycle_listeners = []
+        self.model = AluModel()
+        self.ready_i = 1  # TB is always ready to accept the model's output
+        self.backpressure = None
+
+    def add_input_listener(self, listener):
+        """listener(opcode, a, b) is called for every accepted input"""
+        self.input_listeners.append(listener)
+
+    def add_output_listener(self, listener):
+        """listener(result) is called for every consumed output"""
+        self.output_listeners.append(listener)
+
+    def add_cycle_listener(self, listener):
+        """listener(valid_i, ready_o, valid_o, ready_i) is called at every clock"""
+        self.cycle_listeners.append(listener)
+
+    def _clock(self, valid_i, opcode, a, b):
+        if self.backpressure is not None:
+            self.ready_i = self.backpressure.ready()
+        for listener in self.cycle_listeners:
+            listener(valid_i, self.model.ready_o, self.model.valid_o, self.ready_i)
+        result = self.model.result_o
+        input_handshake, output_handshake = self.model.clock(valid_i, opcode, a, b, self.ready_i)
+        if output_handshake:
+            for listener in self.output_listeners:
+                listener(result)
+        if input_handshake:
+            for listener in self.input_listeners:
+                listener(opcode, a, b)
+        return input_handshake
+
+    def transport(self, opcode: int, a: int, b: int):
+        """Present an input until the model accepts it (the previous result may still wait for ready_i)"""
+        while not self._clock(1, opcode, a, b):
+            pass
+
+    def drain(self):
+        """Clock the model without input until the last result was consumed"""
+        while self.model.valid_o:
+            self._clock(0, 0, 0, 0)
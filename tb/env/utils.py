@@ -1,6 +1,6 @@
 from enum import IntEnum
 from random import Random
-from cocotb.triggers import RisingEdge
+import numpy as np
 
 class AluOp(IntEnum):
     """ ALU operation codes """	
@@ -14,10 +14,30 @@ class AluOp(IntEnum):
     MUL = 0b0111  # Multiplication
     DIV = 0b1000  # Division
 
-async def wait_for_ready_valid(dut, ready_sig, valid_sig):
-        await RisingEdge(dut.clk_i)
-        while not (int(valid_sig.value) and int(ready_sig.value)):
-            await RisingEdge(dut.clk_i)
+RESULT_MASK = (1 << 32) - 1  # Mask for the 32-bit result
+
+def alu_ref_model(opcodes, a, b):
+    """
+    Vectorized ALU reference model: returns the expected 32-bit results for
+    arrays of opcodes and operands (same semantics as rtl/dut.sv compiled by
+    Verilator: shifts by 32 or more give 0, division by zero gives 0).
+    """
+    opcodes = np.asarray(opcodes, dtype=np.uint64)
+    a = np.asarray(a, dtype=np.uint64)
+    b = np.asarray(b, dtype=np.uint64)
+    # Operands are 32-bit, so every intermediate result (even a * b) fits in 64 bits
+    in_range_shift = b < 32
+    shift = np.minimum(b, 31)
+    nonzero_b = b != 0
+    expected = np.select(
+        [opcodes == AluOp.ADD, opcodes == AluOp.SUB, opcodes == AluOp.AND,
+         opcodes == AluOp.OR, opcodes == AluOp.XOR, opcodes == AluOp.SL,
+         opcodes == AluOp.SR, opcodes == AluOp.MUL, opcodes == AluOp.DIV],
+        [a + b, a - b, a & b,
+         a | b, a ^ b, np.where(in_range_shift, a << shift, 0),
+         np.where(in_range_shift, a >> shift, 0), a * b, np.where(nonzero_b, a // np.where(nonzero_b, b, 1), 0)],
+        default=0)
+    return expected & np.uint64(RESULT_MASK)
 
 class UVMComponentMixin:
     """
@@ -27,6 +47,14 @@ class UVMComponentMixin:
     deterministic (UVM style), the RNG will always be seeded with the same value.
     """
     seeding_rng = Random()
+
+    @classmethod
+    def set_seed(cls, seed):
+        """
+        Seed the RNG that seeds all components. Must be called before the test
+        is constructed; the same seed then gives the same component seeds."""
+        cls.seeding_rng.seed(seed)
+
     def __init__(self):
         self._rng = None
         self._seed = self.seeding_rng.randint(0, 2**32 - 1)
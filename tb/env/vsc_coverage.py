@@ -0,0 +1,80 @@
+"""
+pyvsc functional coverage of ALU transactions (COVERAGE_EN=1, default COVERAGE_ENGINE=vsc).
+Kept out of env.env so that pyvsc and pyucis, which are slow to import, are only loaded
+when coverage is collected (see also the native engine in env.coverage).
+"""
+from enum import Enum
+import vsc
+from vsc.impl.coverage_registry import CoverageRegistry
+from env.utils import AluOp
+
+
+@vsc.covergroup
+class AluCovGroup():
+
+    class OperandsEnum(Enum):
+        POSITIVE = 0
+        NEGATIVE = 1
+        ZERO = 2
+
+    def operand_enum(self, value: int) -> OperandsEnum:
+        if value > 0:
+            return self.OperandsEnum.POSITIVE.value
+        elif value < 0:
+            return self.OperandsEnum.NEGATIVE.value
+        else:
+            return self.OperandsEnum.ZERO.value
+
+    def __init__(self):
+
+        self.alu_txn = None  # Item being sampled (AluTxn or AluTxnRecord)
+
+        # Opcode coverpoint
+        self.opcode_cp = vsc.coverpoint(
+            name="opcode",
+            target=lambda: self.alu_txn.opcode.value,
+            bins={op.name: vsc.bin(op.value) for op in AluOp})
+
+        # Operand A coverpoint
+        self.a_cp = vsc.coverpoint(
+            name="operand_a",
+            target=lambda: self.operand_enum(self.alu_txn.a),
+            bins={"positive": vsc.bin(self.OperandsEnum.POSITIVE.value),
+                  "negative": vsc.bin(self.OperandsEnum.NEGATIVE.value),
+                  "zero": vsc.bin(self.OperandsEnum.ZERO.value)})
+
+
+        # Operand B coverpoint
+        self.b_cp = vsc.coverpoint(
+            name="operand_b",
+            target=lambda: self.operand_enum(self.alu_txn.b),
+            bins={"positive": vsc.bin(self.OperandsEnum.POSITIVE.value),
+                  "negative": vsc.bin(self.OperandsEnum.NEGATIVE.value),
+                  "zero": vsc.bin(self.OperandsEnum.ZERO.value)})
+
+        # Cross. Division by zero is never generated: same ignored bins as the native engine
+        self.opcode_operands_cross = vsc.cross(
+            name="opcode_operands_cross",
+            target_l=[self.opcode_cp, self.a_cp, self.b_cp],
+            ignore_bins={"div_by_zero": lambda opcode, a, b: opcode.name == AluOp.DIV.name and b.name == "zero"})
+
+        # TODO: collect coverage for the result: zero, positive, negative, with-carry, overflow
+
+    def write_reports(self, prefix: str):
+        """Write the coverage of all pyvsc covergroups: <prefix>_func_cov.log report and <prefix>_func_cov.xml UCIS DB"""
+        # Coverage report
+        with open(f"{prefix}_func_cov.log", "w") as fp:
+            vsc.report_coverage(fp=fp, details=True)
+        # Coverage DB
+        with open(f"{prefix}_func_cov.xml", "w") as fp:
+            vsc.write_coverage_db(filename=fp)
+
+
+def new_covergroup() -> AluCovGroup:
+    """
+    AluCovGroup of a new test. pyvsc reports every covergroup created in the process (the type
+    coverage merges all instances), so the covergroups of the tests that ran before in the same
+    process (TEST=batch, or several tests in one module) are dropped first: each test reports its own items.
+    """
+    CoverageRegistry.clear()
+    return AluCovGroup()
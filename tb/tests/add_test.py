@@ -1,6 +1,4 @@
 import pyuvm
-import cocotb
-from cocotb.triggers import ClockCycles
 from tests.sequences import AddSeq
 from tests.base_test import BaseTest
 
@@ -8,6 +6,5 @@ from tests.base_test import BaseTest
 class AddTest(BaseTest):
     """Runs the ADD sequence to test the ADD instruction of the ALU."""
     async def run_scenario(self):
-        seq = AddSeq(name="seq", parent=self)
-        await seq.start(self.env.agent.seqr)
-        await ClockCycles(cocotb.top.clk_i, 2)
+        await self.run_on_lanes(lambda agent: AddSeq(name="seq", parent=agent))
+        await self.settle()  # Wait for last item to be processed
@@ -1,9 +1,17 @@
+import os
 from pyuvm import uvm_test, ConfigDB
 import cocotb
-from cocotb.triggers import FallingEdge, ClockCycles, Event
-from env.env import AluEnv
+from cocotb.triggers import FallingEdge, RisingEdge, ClockCycles, Combine, Event
+from env.constraints import AluSampler
+from env.env import AluEnv, AluTxn
+from env.profiling import Profiler, profiling_enabled
+from env.tlm import tlm_enabled
 from env.utils import UVMComponentMixin
 
+# Derive all component seeds from the simulation seed (SEED), so the same seed gives the same stimulus
+if cocotb.RANDOM_SEED is not None:
+    UVMComponentMixin.set_seed(cocotb.RANDOM_SEED)
+
 class BaseTest(uvm_test, UVMComponentMixin):
     """
     Base class for all tests. It introduces a random number generator (RNG).
@@ -14,30 +22,90 @@ class BaseTest(uvm_test, UVMComponentMixin):
     def __init__(self, name, parent=None):
         uvm_test.__init__(self, name, parent)
         UVMComponentMixin.__init__(self)
-        
+        # PROFILE_EN=1: time the phases of the test and (once built) of all its components
+        self.profiler = None
+        if profiling_enabled():
+            self.profiler = Profiler()
+            self.profiler.instrument(self)
+
     def build_phase(self):
+        self.tlm = tlm_enabled()
         self.reset_finished_event = Event()
         ConfigDB().set(None, "*", "reset_finished_event", self.reset_finished_event)
         self.env = AluEnv("env", self)
 
+    def end_of_elaboration_phase(self):
+        if self.profiler:
+            self.profiler.time_method(AluTxn, "randomize", "randomization")
+            self.profiler.time_method(AluTxn, "rnd_operands", "randomization")
+            self.profiler.time_method(AluSampler, "sample", "randomization")
+            for agent, scoreboard in zip(self.env.agents, self.env.scoreboards):
+                self.profiler.time_method(agent.monitor, "sample_coverage", "coverage")
+                self.profiler.time_method(agent.monitor, "sample_cov_batch", "coverage")
+                self.profiler.time_method(scoreboard, "check_queue", "checking")
+            self.profiler.time_method(self.env.recorder, "record", "recording")
+            self.profiler.time_method(self.env.recorder, "record_batch", "recording")
+
     async def run_phase(self):
         self.raise_objection()
-        # Reset then start the sequence
-        self.logger.info("Resetting DUT")
-        await FallingEdge(cocotb.top.clk_i)
-        cocotb.top.arst_n_i.value = 0
-        await ClockCycles(cocotb.top.clk_i, 2, rising=False)
-        cocotb.top.arst_n_i.value = 1
-        await FallingEdge(cocotb.top.clk_i)
+        # Reset then start the sequence (the TLM model starts out of reset)
+        if not self.tlm:
+            self.logger.info("Resetting DUT")
+            await FallingEdge(cocotb.top.clk_i)
+            cocotb.top.arst_n_i.value = 0
+            await ClockCycles(cocotb.top.clk_i, 2, rising=False)
+            cocotb.top.arst_n_i.value = 1
+            await FallingEdge(cocotb.top.clk_i)
         self.reset_finished_event.set()
         self.logger.info("Starting testcase")
         await self.run_scenario()
         self.logger.info("Dropping objection")
         self.drop_objection()    
 
+    def report_phase(self):
+        if self.profiler:
+            self.profiler.restore()
+            prefix = os.getenv("OUT_NAME_PREFIX", "")
+            sampler = self.env.agent.sampler
+            # The interface sampler wakes up once per rising clock edge (shared by all lanes); the TLM model
+            # counts its own
+            clock_edges = sampler.model.cycles if self.tlm else self.profiler.wakeups(sampler)
+            transactions = sum(scoreboard.checked for scoreboard in self.env.scoreboards)
+            self.profiler.report(f"{prefix}_perf.json", transactions=transactions, clock_edges=clock_edges,
+                                 test=type(self).__name__, prefix=prefix, lanes=len(self.env.agents))
+
     async def run_scenario(self):
         """
         Override this method in derived classes to implement the test scenario.
         This method is called after the DUT has been reset and before the objection is dropped.
         """
         raise NotImplementedError("run_scenario must be implemented in derived classes")
+
+    async def run_on_lanes(self, make_seq):
+        """
+        Start one sequence per ALU lane, all at once, and wait for them to finish.
+        make_seq(agent) creates the sequence of a lane; use the agent as the sequence's parent
+        so that every lane is seeded from its own agent's RNG.
+        """
+        await Combine(*[cocotb.start_soon(make_seq(agent).start(agent.seqr)) for agent in self.env.agents])
+
+    async def settle(self):
+        """
+        Wait until the DUT delivered the results of all accepted items on every lane: with
+        backpressure, ready_i can hold the last results back for many cycles. Fails after
+        SETTLE_TIMEOUT cycles. The TLM backends clock their models until the results are out.
+        """
+        if self.tlm:
+            for agent in self.env.agents:
+                agent.sampler.drain()
+            return
+        timeout = int(os.getenv("SETTLE_TIMEOUT", "1000"))
+        monitors = [agent.monitor for agent in self.env.agents]
+        await ClockCycles(cocotb.top.clk_i, 2)
+        for _ in range(timeout):
+            if not any(monitor.pending for monitor in monitors):
+                return
+            await RisingEdge(cocotb.top.clk_i)
+        outstanding = {monitor.lane: len(monitor.pending) for monitor in monitors if monitor.pending}
+        assert not outstanding, \
+            f"Results still outstanding after SETTLE_TIMEOUT={timeout} cycles (lane: items): {outstanding}"
@@ -0,0 +1,54 @@
+"""
+Runs a list of tests back to back inside one simulator process (TEST=batch).
+BATCH_TESTS is a space-separated list of <test module>:<seed> entries, e.g.
+"simple_test:1 simple_test:2 add_test:1". Every entry becomes its own cocotb test
+(own results entry) that runs the @pyuvm.test() classes of the module with the
+entry's seed and the entry's own OUT_NAME_PREFIX (<test>_<seed>_<sim>).
+NOTE: with COVERAGE_EN=1, Verilator writes one code coverage file per process
+(named after the batch), which holds the code coverage of all its entries. Functional
+coverage is per entry: every entry's env starts a new covergroup (the pyvsc registry is
+cleared), so its func_cov files only count its own items.
+"""
+import importlib
+import inspect
+import os
+from contextlib import redirect_stdout
+import cocotb
+from pyuvm import uvm_root, uvm_test
+from env.utils import UVMComponentMixin
+
+
+def test_classes(module):
+    """
+    Return the uvm_test classes a test module registers with @pyuvm.test(), i.e. the ones a
+    standalone run executes: the decorator adds a cocotb test wrapping the class to the module.
+    Base and helper classes, and tests marked skip, are not run.
+    """
+    classes = []
+    for obj in vars(module).values():
+        test_cls = inspect.unwrap(obj) if hasattr(obj, "__wrapped__") else None
+        if isinstance(test_cls, type) and issubclass(test_cls, uvm_test) and not getattr(obj, "skip", False):
+            classes.append(test_cls)
+    return classes
+
+
+def make_batch_test(test_cls, seed, prefix):
+    """Create a cocotb test that runs test_cls as if it was `make sim TEST=<module> SEED=<seed>`"""
+    async def batch_test(_):
+        os.environ["OUT_NAME_PREFIX"] = prefix
+        # Same component seeds as a standalone run with this seed
+        UVMComponentMixin.set_seed(seed)
+        # Components bind their log handlers to sys.stdout when constructed -> per-test log file
+        with open(f"{prefix}.log", "w") as log, redirect_stdout(log):
+            await uvm_root().run_test(test_cls)
+    batch_test.__name__ = batch_test.__qualname__ = f"{prefix}_{test_cls.__name__}"
+    return cocotb.test()(batch_test)
+
+
+sim = os.getenv("SIM", "verilator")
+for entry in os.getenv("BATCH_TESTS", "").split():
+    test_name, seed = entry.split(":")
+    module = importlib.import_module(f"tests.{test_name}")
+    for test_cls in test_classes(module):
+        batch_test = make_batch_test(test_cls, int(seed), f"{test_name}_{seed}_{sim}")
+        globals()[batch_test.name] = batch_test
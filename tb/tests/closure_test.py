@@ -0,0 +1,19 @@
+import os
+import pyuvm
+from tests.sequences import CoverageClosureSeq
+from tests.base_test import BaseTest
+
+@pyuvm.test()
+class ClosureTest(BaseTest):
+    """
+    Runs the coverage closure sequence until the COV_TARGET coverage (default 100%),
+    all reachable bins, a plateau of COV_PLATEAU items or COV_MAX_ITEMS items.
+    """
+    async def run_scenario(self):
+        target = float(os.getenv("COV_TARGET", "100"))
+        plateau = int(os.getenv("COV_PLATEAU", "50"))
+        max_items = int(os.getenv("COV_MAX_ITEMS", "1000"))
+        # Every lane closes coverage on its own stimulus
+        await self.run_on_lanes(lambda agent: CoverageClosureSeq(name="seq", parent=agent, target=target,
+                                                                 plateau=plateau, max_items=max_items))
+        await self.settle()  # Wait for last item to be processed
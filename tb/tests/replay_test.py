@@ -0,0 +1,23 @@
+import os
+import pyuvm
+from env.recorder import read_records, driven_records
+from tests.sequences import ReplaySeq
+from tests.base_test import BaseTest
+
+@pyuvm.test()
+class ReplayTest(BaseTest):
+    """
+    Replays the transactions driven in a recording (REPLAY_FILE, a <prefix>_txns.bin file),
+    optionally only the range REPLAY_START:REPLAY_STOP of them.
+    """
+    async def run_scenario(self):
+        records = driven_records(read_records(os.environ["REPLAY_FILE"]))
+        start = int(os.getenv("REPLAY_START", "0"))
+        stop = int(os.getenv("REPLAY_STOP", str(len(records))))
+        self.logger.info(f"Replaying transactions {start}:{stop} of {os.environ['REPLAY_FILE']}")
+        records = records[start:stop]
+        # Every lane replays the transactions recorded on it (on lane modulo the number of lanes)
+        lanes = len(self.env.agents)
+        await self.run_on_lanes(lambda agent: ReplaySeq(name="seq", parent=agent,
+                                                        records=records[records["lane"] % lanes == agent.lane]))
+        await self.settle()  # Wait for last item to be processed
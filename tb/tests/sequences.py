@@ -1,7 +1,12 @@
+from itertools import islice
+import os
 from random import Random
+import numpy as np
 import cocotb
 from pyuvm import uvm_sequence
-from env.env import AluTxn
+from env.env import AluTxn, AluTxnRecord
+from env.constraints import AluConstraints
+from env.coverage import AluCoverage, POSITIVE, ZERO
 from env.utils import AluOp
 
 class BaseSeq(uvm_sequence):
@@ -10,10 +15,17 @@ class BaseSeq(uvm_sequence):
     For random-stability (reproducible tests), the RNG is seeded with a random
     value derived from the parent sequence or test. If the parent does not have
     a RNG, the RNG is not seeded and a warning is logged.
+    Sequences that do not need a per-item response hand their items over in bulk with
+    send_items(): batches of SEQ_BATCH_SIZE items go through the sequencer's bounded
+    batch queue instead of a start_item/finish_item handshake per item. Bulk items are
+    pooled AluTxnRecords rather than uvm_sequence_items; the driver releases them.
     """
+    batch_size = 64  # Items per batch handed to the driver by send_items()
+
     def __init__(self, name, parent=None):
         super().__init__(name)
         self._rng = None
+        self._np_rng = None
         self._seed = None
         try:
             self._seed = parent.rng.random()
@@ -33,22 +45,137 @@ class BaseSeq(uvm_sequence):
                 self._rng.seed(self._seed)
         return self._rng
 
-class SimpleSeq(BaseSeq):
+    @property
+    def np_rng(self) -> np.random.Generator:
+        """NumPy generator for batch randomization, seeded from the sequence's RNG"""
+        if self._np_rng is None:
+            self._np_rng = np.random.default_rng(self.rng.getrandbits(64))
+        return self._np_rng
+
+    def random_items(self, n: int, constraints: AluConstraints = None):
+        """n items (AluTxnRecords) drawn at once from `constraints` (default: AluTxn.constraints)"""
+        return AluTxnRecord.random_batch(self.np_rng, n, constraints)
+
+    async def send_items(self, items):
+        """
+        Send items to the driver in batches, in order, and wait until all of them were driven
+        (like finish_item). items can be a generator: only one batch is generated ahead of
+        the batch queue. Falls back to the per-item handshake on a plain uvm_sequencer.
+        """
+        batch_size = int(os.getenv("SEQ_BATCH_SIZE", self.batch_size))
+        items = iter(items)
+        bulk = hasattr(self.sequencer, "put_batch")
+        while batch := list(islice(items, batch_size)):
+            if bulk:
+                await self.sequencer.put_batch(batch)
+                continue
+            for item in batch:
+                if isinstance(item, AluTxnRecord):
+                    item = item.to_item(parent=self)
+                await self.start_item(item)
+                await self.finish_item(item)
+        if bulk:
+            await self.sequencer.wait_batches()
+
+class ConstrainedSeq(BaseSeq):
+    """
+    Sends `num_items` items drawn from `constraints` (see env.constraints). A scenario is
+    a set of constraints: pass them, or override the class attributes in a subclass.
+    """
+    constraints = AluTxn.constraints
+    num_items = 100
+
+    def __init__(self, name, parent=None, constraints: AluConstraints = None, num_items: int = None):
+        super().__init__(name, parent)
+        if constraints is not None:
+            self.constraints = constraints
+        if num_items is not None:
+            self.num_items = num_items
+
+    async def body(self):
+        await self.send_items(self.random_items(self.num_items, self.constraints))
+
+class SimpleSeq(ConstrainedSeq):
     """Test all instructions of the ALU"""
+    num_items = len(AluOp)
+
+class AddSeq(ConstrainedSeq):
+    """Test the ADD instruction of the ALU"""
+    constraints = AluTxn.constraints.copy().opcodes({AluOp.ADD: 1})
+    num_items = 5
+
+class CoverageClosureSeq(BaseSeq):
+    """
+    Closed-loop random sequence. It keeps a stimulus-side AluCoverage model of the
+    items it generated and draws the cross bin (opcode, operand A class, operand B
+    class) of every item with weights favoring the bins that are still unhit.
+    The operands are then drawn uniformly within their class. The sequence ends
+    when the coverage reaches `target` percent, when all reachable cross bins are
+    hit, after `plateau` items in a row without a new bin, or after `max_items`.
+    All choices come from the sequence's RNG, so the stimulus only depends on the seed.
+    """
+    unhit_weight = 20  # Weight of an unhit cross bin, a hit one has weight 1
+    operand_classes = (POSITIVE, ZERO)  # Operands are unsigned: the negative bins are unreachable
+
+    def __init__(self, name, parent=None, target=100.0, plateau=50, max_items=1000):
+        super().__init__(name, parent)
+        self.target = target
+        self.plateau = plateau
+        self.max_items = max_items
+        self.coverage = AluCoverage()
+        self.num_items = 0
+        self.stop_reason = None
+
+    def operand(self, operand_class: int) -> int:
+        """Random operand value of an operand class"""
+        if operand_class == ZERO:
+            return 0
+        return self.rng.randint(1, 2**AluTxn.operand_bitwidth - 1)
+
+    def next_stop_reason(self, items_since_new_bin: int, reachable_unhit: int):
+        """Reason to end the sequence now, or None to continue"""
+        if self.coverage.coverage() >= self.target:
+            return f"target {self.target}% reached"
+        if reachable_unhit == 0:
+            return "all reachable bins hit"
+        if items_since_new_bin >= self.plateau:
+            return f"no new bin in {self.plateau} items"
+        if self.num_items >= self.max_items:
+            return f"{self.max_items} items sent"
+        return None
 
     async def body(self):
-        for _ in AluOp:
-            item = AluTxn(name="item", parent=self)
-            item.randomize()
+        bins = [(op, a, b) for op, a, b in self.coverage.cross_bins()
+                if a in self.operand_classes and b in self.operand_classes]
+        items_since_new_bin = 0
+        while True:
+            hits = [self.coverage.cross_hits[cross_bin] for cross_bin in bins]
+            self.stop_reason = self.next_stop_reason(items_since_new_bin, hits.count(0))
+            if self.stop_reason is not None:
+                break
+            weights = [self.unhit_weight if hit == 0 else 1 for hit in hits]
+            opcode, a_class, b_class = self.rng.choices(bins, weights)[0]
+            item = AluTxn(name="item", parent=self, opcode=opcode,
+                          a=self.operand(a_class), b=self.operand(b_class))
+            item.post_randomize()
+            new_bin = self.coverage.cross_hits[opcode, a_class, b_class] == 0
+            self.coverage.sample(item.opcode, item.a, item.b)
+            items_since_new_bin = 0 if new_bin else items_since_new_bin + 1
+            self.num_items += 1
             await self.start_item(item)
             await self.finish_item(item)
+        cocotb.log.info(f"{self.get_full_name()}: coverage {self.coverage.coverage():.2f}% "
+                        f"after {self.num_items} items ({self.stop_reason})")
 
-class AddSeq(BaseSeq):
-    """Test the ADD instruction of the ALU"""
+class ReplaySeq(BaseSeq):
+    """
+    Re-drives a recorded stream of transactions (records with opcode, a and b fields,
+    see env.recorder) exactly as recorded: nothing is randomized.
+    """
+    def __init__(self, name, parent=None, records=()):
+        super().__init__(name, parent)
+        self.records = records
 
     async def body(self):
-        for _ in range(5):
-            item = AluTxn(name="item", parent=self, opcode=AluOp.ADD)
-            item.rnd_operands()
-            await self.start_item(item)
-            await self.finish_item(item)
\ No newline at end of file
+        await self.send_items(AluTxnRecord.acquire(AluOp(int(record["opcode"])), int(record["a"]), int(record["b"]))
+                              for record in self.records)
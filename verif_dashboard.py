@@ -3,16 +3,21 @@
 import argparse
 import subprocess
 import datetime
+import json
 import os
+import sqlite3
 import xml.etree.ElementTree as ET
 import glob
 import re
-from ucis import CoverageReportBuilder
-from ucis.xml.xml_reader import XmlReader
+from concurrent.futures import ProcessPoolExecutor
+from coverage_merge import merge_code_coverage, merge_functional_coverage, functional_coverage
+
+# Below this many new results files, parsing them in the current process is faster than starting a pool
+PARALLEL_PARSE_MIN_FILES = 64
 
 def get_signature():
     """Get git branch, short commit hash, and timestamp"""
-    timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")        
+    timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     try:
         branch = subprocess.check_output(['git', 'rev-parse', '--abbrev-ref', 'HEAD'], text=True).strip()
         commit = subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], text=True).strip()
@@ -25,54 +30,220 @@ def get_signature():
         "timestamp": timestamp
     }
 
-def get_test_metrics(sim_dir="sim"):
+class ResultsIndex:
     """
-    Extract test metrics from CocoTB XML result files.
-    The metrics include: total tests, passed tests, failed tests, and total time.
+    On-disk (SQLite) index of the result and coverage files already ingested from a sim directory.
+    - files: one row per ingested file, keyed by name, with the size and mtime it had when it was
+      ingested and, for results files, its test counts. A file is parsed again only if it changed.
+    - merged: coverage of the merged coverage files, so they are only re-evaluated when they change.
+    - runs: one row per dashboard generation (branch, commit, pass rate, coverage) for the history.
+    - perf: the metrics of each ingested <prefix>_perf.json (PROFILE_EN=1 runs).
+    - dut_stats: the DUT performance of each ingested <prefix>_dut_stats.json (DUT_STATS=1 runs).
     """
+    def __init__(self, db_file):
+        self.db = sqlite3.connect(db_file)
+        self.db.executescript("""
+            CREATE TABLE IF NOT EXISTS files (
+                name TEXT PRIMARY KEY, kind TEXT, size INTEGER, mtime REAL,
+                total INTEGER DEFAULT 0, failed INTEGER DEFAULT 0, time REAL DEFAULT 0.0);
+            CREATE TABLE IF NOT EXISTS merged (kind TEXT PRIMARY KEY, coverage REAL);
+            CREATE TABLE IF NOT EXISTS runs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT, timestamp TEXT, branch TEXT, commit_hash TEXT,
+                total_tests INTEGER, passed_tests INTEGER, failed_tests INTEGER, total_time REAL,
+                code_coverage REAL, functional_coverage REAL);
+            CREATE TABLE IF NOT EXISTS perf (
+                name TEXT PRIMARY KEY, test TEXT, wall_time REAL, sim_time_ns REAL, transactions INTEGER,
+                clock_edges INTEGER, sections TEXT);
+            CREATE TABLE IF NOT EXISTS dut_stats (
+                name TEXT PRIMARY KEY, test TEXT, cycles INTEGER, lane_cycles INTEGER, transactions INTEGER,
+                input_stall_cycles INTEGER, output_stall_cycles INTEGER, latency TEXT);
+        """)
+
+    def scan(self, sim_dir, pattern, kind, exclude=()):
+        """
+        Compare the files matching pattern (except the exclude names) with the index.
+        Returns (new or modified files, names of ingested files that were modified or removed).
+        """
+        indexed = {name: (size, mtime) for name, size, mtime in
+                   self.db.execute("SELECT name, size, mtime FROM files WHERE kind = ?", (kind,))}
+        new_files = []
+        stale = []
+        for path in glob.glob(os.path.join(sim_dir, pattern)):
+            name = os.path.basename(path)
+            if name in exclude:
+                continue
+            stat = os.stat(path)
+            previous = indexed.pop(name, None)
+            if previous != (stat.st_size, stat.st_mtime):
+                new_files.append(path)
+                if previous is not None:
+                    stale.append(name)
+        # Whatever is left in the index was removed from the sim directory
+        return new_files, stale + list(indexed)
+
+    def add_file(self, path, kind, total=0, failed=0, time=0.0):
+        stat = os.stat(path)
+        self.db.execute("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        (os.path.basename(path), kind, stat.st_size, stat.st_mtime, total, failed, time))
+
+    def remove_files(self, names):
+        self.db.executemany("DELETE FROM files WHERE name = ?", [(name,) for name in names])
+
+    def clear_kind(self, kind):
+        self.db.execute("DELETE FROM files WHERE kind = ?", (kind,))
+        if kind in ("perf", "dut_stats"):
+            self.db.execute(f"DELETE FROM {kind}")
+
+    def add_perf(self, path, perf):
+        self.add_file(path, "perf", time=perf["wall_time"])
+        self.db.execute("INSERT OR REPLACE INTO perf VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        (os.path.basename(path), perf["test"], perf["wall_time"], perf["sim_time_ns"],
+                         perf["transactions"], perf["clock_edges"], json.dumps(perf["sections"])))
+
+    def remove_perf(self, names):
+        self.remove_files(names)
+        self.db.executemany("DELETE FROM perf WHERE name = ?", [(name,) for name in names])
+
+    def perf_by_test(self):
+        """Per test: (runs, wall time, sim time, transactions, clock edges, {section: time}) summed over its runs"""
+        totals = {}
+        for test, wall_time, sim_time_ns, transactions, clock_edges, sections in self.db.execute(
+                "SELECT test, wall_time, sim_time_ns, transactions, clock_edges, sections FROM perf ORDER BY test"):
+            runs, wall, sim, txns, edges, section_times = totals.get(test, (0, 0.0, 0.0, 0, 0, {}))
+            for section, stat in json.loads(sections).items():
+                section_times[section] = section_times.get(section, 0.0) + stat["time"]
+            totals[test] = (runs + 1, wall + wall_time, sim + sim_time_ns, txns + transactions,
+                            edges + clock_edges, section_times)
+        return totals
+
+    def add_dut_stats(self, path, stats):
+        self.add_file(path, "dut_stats")
+        # Stalls are counted per lane: they are relative to the cycles of all lanes
+        lane_cycles = sum(lane["cycles"] for lane in stats["per_lane"])
+        self.db.execute("INSERT OR REPLACE INTO dut_stats VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                        (os.path.basename(path), stats["test"], stats["cycles"], lane_cycles, stats["transactions"],
+                         stats["input_stall_cycles"], stats["output_stall_cycles"],
+                         json.dumps({op: latency["histogram"] for op, latency in stats["latency"].items()})))
 
-    # Find all XML result files
-    xml_pattern = os.path.join(sim_dir, "*_results.xml")
-    xml_files = glob.glob(xml_pattern)
-    
-    if not xml_files:
-        # No XML files found
-        return {"total_tests": 0, "passed_tests": 0, "failed_tests": 0, "total_time": 0.0}
+    def remove_dut_stats(self, names):
+        self.remove_files(names)
+        self.db.executemany("DELETE FROM dut_stats WHERE name = ?", [(name,) for name in names])
 
-    # Initialize counters
+    def dut_stats_by_test(self):
+        """
+        Per test: (runs, cycles, lane cycles, transactions, input stalls, output stalls, {latency: count})
+        summed over its runs
+        """
+        totals = {}
+        for test, cycles, lane_cycles, transactions, input_stalls, output_stalls, latency in self.db.execute(
+                "SELECT test, cycles, lane_cycles, transactions, input_stall_cycles, output_stall_cycles, latency "
+                "FROM dut_stats ORDER BY test"):
+            runs, total_cycles, total_lane_cycles, txns, in_stalls, out_stalls, histogram = \
+                totals.get(test, (0, 0, 0, 0, 0, 0, {}))
+            for op_histogram in json.loads(latency).values():
+                for latency_cycles, count in op_histogram.items():
+                    histogram[int(latency_cycles)] = histogram.get(int(latency_cycles), 0) + count
+            totals[test] = (runs + 1, total_cycles + cycles, total_lane_cycles + lane_cycles, txns + transactions,
+                            in_stalls + input_stalls, out_stalls + output_stalls, histogram)
+        return totals
+
+    def test_totals(self):
+        """(total, failed, time) summed over all ingested results files"""
+        return self.db.execute(
+            "SELECT COALESCE(SUM(total), 0), COALESCE(SUM(failed), 0), COALESCE(SUM(time), 0.0) "
+            "FROM files WHERE kind = 'results'").fetchone()
+
+    def merged_coverage(self, kind):
+        row = self.db.execute("SELECT coverage FROM merged WHERE kind = ?", (kind,)).fetchone()
+        return row[0] if row else None
+
+    def set_merged_coverage(self, kind, coverage):
+        self.db.execute("INSERT OR REPLACE INTO merged VALUES (?, ?)", (kind, coverage))
+
+    def add_run(self, signature, test_metrics, code_cov, func_cov):
+        self.db.execute(
+            "INSERT INTO runs (timestamp, branch, commit_hash, total_tests, passed_tests, failed_tests, "
+            "total_time, code_coverage, functional_coverage) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (signature["timestamp"], signature["branch"], signature["commit"], test_metrics["total_tests"],
+             test_metrics["passed_tests"], test_metrics["failed_tests"], test_metrics["total_time"],
+             code_cov["code_coverage"], func_cov["functional_coverage"]))
+
+    def history(self, branch=None, limit=20):
+        """Most recent runs first, optionally of one branch only"""
+        query = ("SELECT timestamp, branch, commit_hash, total_tests, passed_tests, failed_tests, total_time, "
+                 "code_coverage, functional_coverage FROM runs")
+        params = ()
+        if branch is not None:
+            query += " WHERE branch = ?"
+            params = (branch,)
+        query += " ORDER BY id DESC LIMIT ?"
+        return self.db.execute(query, params + (limit,)).fetchall()
+
+    def commit(self):
+        self.db.commit()
+
+    def close(self):
+        self.db.commit()
+        self.db.close()
+
+def parse_results_file(xml_file):
+    """
+    Return (total tests, failed tests, total time) of a CocoTB XML results file.
+    The file is streamed with iterparse: each testcase is dropped once it has been counted.
+    """
     total_tests = 0
     failed_tests = 0
     total_time = 0.0
-
-    # Parse each XML file
-    for xml_file in xml_files:
+    for _, elem in ET.iterparse(xml_file):
+        if elem.tag != "testcase":
+            continue
+        total_tests += 1
+        # Check for failure
+        if elem.find("failure") is not None:
+            failed_tests += 1
+        # Collect time (default to 0.0 if not present or invalid)
+        time_attr = elem.get("time", "0.0")
         try:
-            tree = ET.parse(xml_file)
-            root = tree.getroot()
-            
-            # Count all testcases
-            testcases = root.findall(".//testcase")
-            total_tests += len(testcases)
-
-            for testcase in testcases:
-                # Check for failure
-                if testcase.find("failure") is not None:
-                    failed_tests += 1
-
-                # Collect time (default to 0.0 if not present or invalid)
-                time_attr = testcase.get("time", "0.0")
-                try:
-                    total_time += float(time_attr)
-                except (ValueError, TypeError):
-                    print(f"Warning: Invalid time value '{time_attr}' in {xml_file}")
-                    continue
-            
-        except Exception as e:
-            print(f"Warning: Error processing {xml_file}: {e}")
+            total_time += float(time_attr)
+        except (ValueError, TypeError):
+            print(f"Warning: Invalid time value '{time_attr}' in {xml_file}")
+        elem.clear()
+    return total_tests, failed_tests, total_time
+
+def _parse_results_file_safe(xml_file):
+    try:
+        return parse_results_file(xml_file), None
+    except Exception as e:
+        return None, str(e)
+
+def get_test_metrics(sim_dir="sim", index=None):
+    """
+    Extract test metrics from CocoTB XML result files.
+    The metrics include: total tests, passed tests, failed tests, and total time.
+    Only the files that are new or changed since the last call are parsed (in parallel if there are many).
+    """
+    index = index or ResultsIndex(os.path.join(sim_dir, "dashboard.db"))
+
+    # Find the XML result files that were not ingested yet
+    new_files, stale = index.scan(sim_dir, "*_results.xml", "results")
+    index.remove_files(stale)
+
+    if len(new_files) >= PARALLEL_PARSE_MIN_FILES:
+        with ProcessPoolExecutor() as pool:
+            parsed = list(pool.map(_parse_results_file_safe, new_files, chunksize=32))
+    else:
+        parsed = [_parse_results_file_safe(xml_file) for xml_file in new_files]
+
+    for xml_file, (metrics, error) in zip(new_files, parsed):
+        if error is not None:
+            print(f"Warning: Error processing {xml_file}: {error}")
             continue
-    
+        index.add_file(xml_file, "results", *metrics)
+    index.commit()
+
+    total_tests, failed_tests, total_time = index.test_totals()
     passed_tests = total_tests - failed_tests
-    
+
     return {
         "total_tests": total_tests,
         "passed_tests": passed_tests,
@@ -80,48 +251,143 @@ def get_test_metrics(sim_dir="sim"):
         "total_time": round(total_time, 3)
     }
 
-def get_code_coverage(sim_dir="sim"):
+def get_perf_metrics(sim_dir="sim", index=None):
+    """
+    Ingest the new or changed <prefix>_perf.json files of profiled runs (PROFILE_EN=1).
+    Returns the per-test totals of ResultsIndex.perf_by_test.
+    """
+    index = index or ResultsIndex(os.path.join(sim_dir, "dashboard.db"))
+    new_files, stale = index.scan(sim_dir, "*_perf.json", "perf")
+    index.remove_perf(stale)
+    for perf_file in new_files:
+        try:
+            with open(perf_file) as fp:
+                index.add_perf(perf_file, json.load(fp))
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Warning: Error processing {perf_file}: {e}")
+    index.commit()
+    return index.perf_by_test()
+
+def print_perf_metrics(perf):
+    """Regression performance table: where the wall time of each test goes"""
+    print("\nPERFORMANCE (profiled runs):")
+    print(f"   {'Test':24s} {'Runs':>5s} {'Avg Time':>9s} {'Txns/s':>10s} {'Sim ns/s':>10s} {'Edges/s':>10s}  Sections")
+    for test, (runs, wall, sim, txns, edges, section_times) in perf.items():
+        shares = ", ".join(f"{section} {time / wall * 100:.1f}%" for section, time in sorted(section_times.items())) \
+            if wall else ""
+        wall = wall or float("inf")
+        print(f"   {test:24s} {runs:5d} {wall / runs:8.2f}s {txns / wall:10.1f} {sim / wall:10.1f} {edges / wall:10.1f}  "
+              f"{shares}")
+
+def get_dut_stats(sim_dir="sim", index=None):
+    """
+    Ingest the new or changed <prefix>_dut_stats.json files of runs with DUT_STATS=1.
+    Returns the per-test totals of ResultsIndex.dut_stats_by_test.
+    """
+    index = index or ResultsIndex(os.path.join(sim_dir, "dashboard.db"))
+    new_files, stale = index.scan(sim_dir, "*_dut_stats.json", "dut_stats")
+    index.remove_dut_stats(stale)
+    for stats_file in new_files:
+        try:
+            with open(stats_file) as fp:
+                index.add_dut_stats(stats_file, json.load(fp))
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Warning: Error processing {stats_file}: {e}")
+    index.commit()
+    return index.dut_stats_by_test()
+
+def latency_percentile(histogram, q):
+    """Latency below which a fraction q of the items of a {latency: count} histogram fall"""
+    count = sum(histogram.values())
+    cumulative = 0
+    for latency in sorted(histogram):
+        cumulative += histogram[latency]
+        if cumulative >= q * count:
+            return latency
+    return 0
+
+def print_dut_stats(dut_stats):
+    """DUT performance table: throughput, stalls and latency percentiles of each test"""
+    print("\nDUT PERFORMANCE (DUT_STATS=1 runs):")
+    print(f"   {'Test':24s} {'Runs':>5s} {'Txns/cycle':>10s} {'In stall':>9s} {'Out stall':>9s} "
+          f"{'p50':>5s} {'p99':>5s} {'Max':>5s}  (latency in cycles)")
+    for test, (runs, cycles, lane_cycles, txns, in_stalls, out_stalls, histogram) in dut_stats.items():
+        cycles, lane_cycles = cycles or 1, lane_cycles or 1
+        print(f"   {test:24s} {runs:5d} {txns / cycles:10.3f} {in_stalls / lane_cycles * 100:8.1f}% "
+              f"{out_stalls / lane_cycles * 100:8.1f}% {latency_percentile(histogram, 0.5):5d} "
+              f"{latency_percentile(histogram, 0.99):5d} {max(histogram, default=0):5d}")
+
+def fold_coverage(sim_dir, index, pattern, kind, merged_file, merge_files, read_coverage):
+    """
+    Fold the coverage files matching pattern that are new since the last call into merged_file.
+    merge_files(output, inputs) merges coverage files into output and returns the merged database (None on
+    failure), read_coverage(merged database) returns its coverage. If an already merged file was modified or removed, everything
+    is merged again from scratch (its old counts can't be subtracted). Returns the coverage, or None.
+    """
+    # The merged file matches the pattern too
+    exclude = (os.path.basename(merged_file),)
+    new_files, stale = index.scan(sim_dir, pattern, kind, exclude)
+    if stale or not os.path.isfile(merged_file):
+        # Start over from all current files
+        index.clear_kind(kind)
+        new_files = [path for path in glob.glob(os.path.join(sim_dir, pattern)) if os.path.basename(path) not in exclude]
+        inputs = new_files
+    else:
+        inputs = [merged_file] + new_files
+
+    if new_files or (inputs and index.merged_coverage(kind) is None):
+        # Merge into a temporary file: the previous merged file is kept if the merge fails
+        tmp_file = merged_file + ".tmp"
+        merged = merge_files(tmp_file, inputs)
+        if merged is None:
+            return None
+        os.replace(tmp_file, merged_file)
+        index.set_merged_coverage(kind, read_coverage(merged))
+        for path in new_files:
+            index.add_file(path, kind)
+        index.commit()
+    elif not inputs:
+        return None
+    return index.merged_coverage(kind)
+
+def get_code_coverage(sim_dir="sim", index=None):
     """
     Merge Verilator .dat coverage files and extract total code coverage percentage.
-    Creates merged_code_cov.dat in the sim directory and keeps it.
-    """
-    
-    # Find all .dat coverage files
-    dat_pattern = os.path.join(sim_dir, "*_code_cov.dat")
-    dat_files = glob.glob(dat_pattern)
-    
-    if not dat_files:
+    Creates merged_code_cov.dat in the sim directory and keeps it; later calls only fold in the new .dat files.
+    """
+    index = index or ResultsIndex(os.path.join(sim_dir, "dashboard.db"))
+
+    if not glob.glob(os.path.join(sim_dir, "*_code_cov.dat")):
         print("Warning: No .dat coverage files found")
         return {"code_coverage": 0.0}
-    
+
     # Define merged coverage file path
     merged_file = os.path.join(sim_dir, "merged_code_cov.dat")
-    
-    try:
-        # Merge .dat files
-        merge_cmd = ["verilator_coverage", "--write", merged_file] + dat_files
-        result = subprocess.run(merge_cmd, capture_output=True, text=True, cwd=sim_dir)
-        
-        if result.returncode != 0:
-            print(f"Warning: verilator_coverage merge failed: {result.stderr}")
-            return {"code_coverage": 0.0}
-        
+
+    def merge_files(output, inputs):
+        # Merge .dat files in-process
+        return merge_code_coverage(inputs, output)
+
+    def read_coverage(merged):
         # Extract coverage percentage from merged file
         report_cmd = ["verilator_coverage", merged_file, "--annotate", "/tmp/ann_tmp", "--annotate-min", "1"]
         result = subprocess.run(report_cmd, capture_output=True, text=True, cwd=sim_dir)
-        
+
         if result.returncode != 0:
             print(f"Warning: verilator_coverage report failed: {result.stderr}")
-            return {"code_coverage": 0.0}
-        
+            return 0.0
+
         # Parse coverage percentage from output using regex
         # Look for "Total coverage (31/42) 73.00%"
         match = re.search(r'Total coverage.*?(\d+\.?\d*)%', result.stdout)
         if match:
-            return {"code_coverage": round(float(match.group(1)), 2)}
+            return round(float(match.group(1)), 2)
+        return 0.0
+
+    try:
+        coverage = fold_coverage(sim_dir, index, "*_code_cov.dat", "code_cov", merged_file, merge_files, read_coverage)
+        return {"code_coverage": coverage or 0.0}
 
-        return {"code_coverage": 0.0}
-        
     except FileNotFoundError:
         print("Warning: verilator_coverage tool not found")
         return {"code_coverage": 0.0}
@@ -129,72 +395,73 @@ def get_code_coverage(sim_dir="sim"):
         print(f"Warning: Error processing code coverage: {e}")
         return {"code_coverage": 0.0}
 
-def get_functional_coverage(sim_dir="sim"):
+def get_functional_coverage(sim_dir="sim", index=None):
     """
     Merge UCIS XML functional coverage files and extract total functional coverage percentage.
-    Creates merged_func_cov.xml in the sim directory and keeps it.
-    """
-    
-    # Find all functional coverage XML files
-    xml_pattern = os.path.join(sim_dir, "*_func_cov.xml")
-    xml_files = glob.glob(xml_pattern)
-    
-    if not xml_files:
+    Creates merged_func_cov.xml in the sim directory and keeps it; later calls only fold in the new XML files.
+    """
+    index = index or ResultsIndex(os.path.join(sim_dir, "dashboard.db"))
+
+    if not glob.glob(os.path.join(sim_dir, "*_func_cov.xml")):
         print("Warning: No functional coverage XML files found")
         return {"functional_coverage": 0.0}
-    
+
     # Define merged functional coverage file path
     merged_file = os.path.join(sim_dir, "merged_func_cov.xml")
-    
+
+    def merge_files(output, inputs):
+        # Merge XML files in-process, the merged database is kept in memory for the report
+        return merge_functional_coverage(inputs, output)
+
+    def read_coverage(db):
+        return int(functional_coverage(db))
+
     try:
-        # Merge XML files using pyucis merge command
-        merge_cmd = ["pyucis", "merge", "--out", merged_file] + xml_files
-        result = subprocess.run(merge_cmd, capture_output=True, text=True, cwd=sim_dir)
-        
-        if result.returncode != 0:
-            print(f"Warning: pyucis merge failed: {result.stderr}")
-            return {"functional_coverage": 0.0}
-        
-        # Read merged XML file and extract coverage
-        xml_reader = XmlReader()
-        db = xml_reader.read(merged_file)
-        cov_report = CoverageReportBuilder.build(db)
-        functional_coverage = int(cov_report.coverage)
-        
-        return {"functional_coverage": round(functional_coverage, 2)}
+        coverage = fold_coverage(sim_dir, index, "*_func_cov.xml", "func_cov", merged_file, merge_files, read_coverage)
+        return {"functional_coverage": round(coverage or 0.0, 2)}
 
     except Exception as e:
         print(f"Warning: Error processing functional coverage: {e}")
         return {"functional_coverage": 0.0}
 
-def generate_dashboard(sim_dir="sim"):
+def generate_dashboard(sim_dir="sim", db_file=None):
     """
     Generate the complete verification dashboard with signature and metrics.
+    The metrics are stored as a new run in the history of the results database.
     """
     print("=" * 50)
     print("Generating Verification Dashboard...")
     print("=" * 50)
-    
+
     # Get signature
     signature = get_signature()
     print(f"Git Info: {signature['branch']}@{signature['commit']}")
     print(f"Generated: {signature['timestamp']}")
     print("=" * 50)
 
+    index = ResultsIndex(db_file or os.path.join(sim_dir, "dashboard.db"))
+
     # Get test metrics
     print("Collecting test metrics...")
-    test_metrics = get_test_metrics(sim_dir)
-    
+    test_metrics = get_test_metrics(sim_dir, index)
+
     # Get code coverage
     print("Processing code coverage...")
-    code_cov = get_code_coverage(sim_dir)
-    
+    code_cov = get_code_coverage(sim_dir, index)
+
     # Get functional coverage
     print("Processing functional coverage...")
-    func_cov = get_functional_coverage(sim_dir)
+    func_cov = get_functional_coverage(sim_dir, index)
+
+    # Get the performance of the profiled runs
+    perf = get_perf_metrics(sim_dir, index)
+    dut_stats = get_dut_stats(sim_dir, index)
+
+    index.add_run(signature, test_metrics, code_cov, func_cov)
+    index.close()
 
     print("=" * 50)
-    
+
     # Display test metrics
     print("TEST METRICS:")
     print(f"   Total Tests:     {test_metrics['total_tests']}")
@@ -206,23 +473,58 @@ def generate_dashboard(sim_dir="sim"):
     else:
         print(f"   Pass Rate:       N/A")
     print(f"   Total Time:      {test_metrics['total_time']}s")
-    
+
     # Display coverage metrics
     print("\nCOVERAGE METRICS:")
     print(f"   Code Coverage:       {code_cov['code_coverage']}%")
-    print(f"   Functional Coverage: {func_cov['functional_coverage']}%")    
+    print(f"   Functional Coverage: {func_cov['functional_coverage']}%")
+    if perf:
+        print_perf_metrics(perf)
+    if dut_stats:
+        print_dut_stats(dut_stats)
     print("=" * 50)
-    
+
+def print_history(sim_dir="sim", db_file=None, branch=None, limit=20):
+    """Print pass rate and coverage of the last dashboard runs, across commits"""
+    index = ResultsIndex(db_file or os.path.join(sim_dir, "dashboard.db"))
+    runs = index.history(branch, limit)
+    index.close()
+    print(f"{'Timestamp':19s}  {'Branch@Commit':30s} {'Tests':>6s} {'Pass Rate':>9s} {'Time':>10s} {'Code':>7s} {'Func':>7s}")
+    for timestamp, run_branch, commit, total, passed, failed, total_time, code_cov, func_cov in runs:
+        pass_rate = f"{passed / total * 100:.2f}%" if total else "N/A"
+        print(f"{timestamp:19s}  {run_branch + '@' + commit:30s} {total:6d} {pass_rate:>9s} {total_time:9.1f}s "
+              f"{code_cov:6.2f}% {func_cov:6.2f}%")
 
 def main():
     parser = argparse.ArgumentParser(description="Generate Verification Dashboard")
-    parser.add_argument("--sim-dir", default="sim", 
+    parser.add_argument("--sim-dir", default="sim",
                        help="Directory containing simulation results (default: sim)")
-    
+    parser.add_argument("--db", default=None,
+                       help="Results database (default: <sim-dir>/dashboard.db)")
+    parser.add_argument("--rebuild", action="store_true",
+                       help="Forget all ingested files and re-parse/re-merge everything")
+    parser.add_argument("--history", action="store_true",
+                       help="Print the pass rate and coverage of previous runs instead of generating a dashboard")
+    parser.add_argument("--branch", default=None,
+                       help="Only show the history of this branch")
+    parser.add_argument("--limit", type=int, default=20,
+                       help="Number of runs shown by --history (default: 20)")
+
     args = parser.parse_args()
 
-    generate_dashboard(args.sim_dir)
+    if args.history:
+        print_history(args.sim_dir, args.db, args.branch, args.limit)
+        return
+    if args.rebuild:
+        index = ResultsIndex(args.db or os.path.join(args.sim_dir, "dashboard.db"))
+        for kind in ("results", "code_cov", "func_cov", "perf", "dut_stats"):
+            index.clear_kind(kind)
+        index.close()
+        for merged_file in ("merged_code_cov.dat", "merged_func_cov.xml"):
+            if os.path.isfile(os.path.join(args.sim_dir, merged_file)):
+                os.remove(os.path.join(args.sim_dir, merged_file))
+    generate_dashboard(args.sim_dir, args.db)
 
 # When the script is run directly, invoke the main function
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()